@@ -0,0 +1,223 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from esquema import soma
+
+# --------------------------------------------------
+# CUBO DE PRODUTOS
+# --------------------------------------------------
+# Uma única passada de groupby sobre as linhas de item. Rankings, curva ABC,
+# matriz estratégica e margens por Seção/Grupo saem todos desse cubo, que
+# tem uma linha por (DESCRICAO, Seção, Grupo) em vez de uma por item vendido.
+CHAVES_CUBO = ['DESCRICAO', 'Seção', 'Grupo']
+
+COLUNAS_SOMA = [
+    'Valor Total Liquido',
+    'Lucro',
+    'Quantidade',
+    'Prejuízo Total',
+    'Margem Unitária',
+    'Margem Negativa',
+    'Linhas com Prejuízo',
+    'Prejuízo Negativo',
+    'Linhas',
+]
+
+
+def cubo_produtos(df):
+    """Agrega as linhas de item por produto numa única passada."""
+    chaves = [c for c in CHAVES_CUBO if c in df.columns]
+
+    if 'Margem Unitária' in df.columns:
+        margem = df['Margem Unitária']
+    else:
+        margem = df['Valor Unitário Bruto'] - df['Custo Gerencial']
+
+    if 'Prejuízo Total' in df.columns:
+        prejuizo = df['Prejuízo Total']
+    else:
+        prejuizo = margem * df['Quantidade']
+
+    # A soma é acumulada em float64 mesmo com a Quantidade em int8/int16
+    margem = margem.astype('float64')
+    prejuizo = prejuizo.astype('float64')
+    em_prejuizo = margem < 0
+
+    base = pd.DataFrame({
+        **{c: df[c] for c in chaves},
+        'Valor Total Liquido': df['Valor Total Liquido'].astype('float64'),
+        'Lucro': df['Lucro'].astype('float64'),
+        'Quantidade': df['Quantidade'].astype('float64'),
+        'Prejuízo Total': prejuizo,
+        'Margem Unitária': margem,
+        'Margem Negativa': margem.where(em_prejuizo, 0),
+        'Linhas com Prejuízo': em_prejuizo.astype('int64'),
+        'Prejuízo Negativo': prejuizo.where(prejuizo < 0, 0),
+        'Linhas': margem.notna().astype('int64'),
+    })
+
+    return (
+        base.groupby(chaves, dropna=False, observed=True, sort=False)
+        .sum()
+        .reset_index()
+    )
+
+
+def _com_medias(tabela, chave):
+    # Tabela pequena: a chave volta a ser texto simples para os gráficos
+    tabela[chave] = tabela[chave].astype(object)
+    tabela['Margem Unitária Média'] = tabela['Margem Unitária'] / tabela['Linhas']
+    tabela['Margem Negativa Média'] = (
+        tabela['Margem Negativa'] / tabela['Linhas com Prejuízo']
+    ).where(tabela['Linhas com Prejuízo'] > 0)
+    return tabela
+
+
+def por_produto(cubo):
+    """Totais por DESCRICAO (o cubo já é pequeno, reagrupar é barato)."""
+    produtos = cubo.groupby('DESCRICAO', observed=True)[COLUNAS_SOMA].sum()
+    return _com_medias(produtos.reset_index(), 'DESCRICAO')
+
+
+def por_dimensao(cubo, coluna):
+    """Totais por Seção ou Grupo."""
+    tabela = cubo.groupby(coluna, observed=True)[COLUNAS_SOMA].sum()
+    return _com_medias(tabela.reset_index(), coluna)
+
+
+def ranking(produtos, coluna, n=10, crescente=False):
+    """Os n produtos com maior (ou menor) valor na coluna.
+
+    A ordem é a mesma nos dois backends: compara-se o valor em centavos, pois
+    somas feitas em outra ordem diferem na 9ª casa, e o empate é decidido
+    pela DESCRICAO.
+    """
+    produtos = produtos.dropna(subset=[coluna])
+    chave = pd.DataFrame({
+        'valor': produtos[coluna].round(2).to_numpy(),
+        'descricao': produtos['DESCRICAO'].to_numpy(),
+    })
+    posicoes = chave.sort_values(
+        ['valor', 'descricao'], ascending=[crescente, True], kind='stable'
+    ).index[:n]
+    return produtos[['DESCRICAO', coluna]].iloc[posicoes].reset_index(drop=True)
+
+
+# --------------------------------------------------
+# INDICADORES DE CARTEIRA
+# --------------------------------------------------
+def produtos_com_prejuizo(produtos):
+    return int((produtos['Linhas com Prejuízo'] > 0).sum())
+
+
+def impacto_prejuizo(cubo):
+    return cubo['Prejuízo Negativo'].sum()
+
+
+# --------------------------------------------------
+# BACKENDS DE AGREGAÇÃO
+# --------------------------------------------------
+# As varreduras sobre as linhas de item (totais e cubo) podem rodar em
+# pandas ou no DuckDB embutido (VENDAS_BACKEND=duckdb). Rankings, curva ABC
+# e margens por Grupo/Seção saem do cubo nos dois casos.
+BACKEND = os.environ.get('VENDAS_BACKEND', 'pandas')
+
+COLUNAS_TOTAIS = ['Valor Total Liquido', 'Lucro', 'Quantidade']
+
+
+class AgregadorPandas:
+
+    def __init__(self, df):
+        self.df = df
+
+    def totais(self):
+        return {c: soma(self.df[c]) for c in COLUNAS_TOTAIS}
+
+    def cubo(self):
+        return cubo_produtos(self.df)
+
+
+def criar_agregador(df, arquivo=None, backend=None):
+    """Agregador do backend configurado; arquivo é o .duckdb persistente do dataset."""
+    if (backend or BACKEND) == 'duckdb':
+        from agregacao_duckdb import AgregadorDuckDB
+        return AgregadorDuckDB(df, arquivo)
+    return AgregadorPandas(df)
+
+
+# --------------------------------------------------
+# CACHE DE AGREGADOS POR COMBINAÇÃO DE FILTROS
+# --------------------------------------------------
+# Voltar a uma seleção de Seção/Grupo já vista não refaz o groupby: o
+# resultado fica guardado pela chave (dataset, filtros, apenas prejuízo) até
+# o limite de memória, descartando primeiro o usado há mais tempo.
+LIMITE_AGREGADOS_MB = int(os.environ.get('VENDAS_CACHE_AGREGADOS_MB', '256'))
+
+
+def chave_agregado(tipo, chave_dataset, selecao, apenas_prejuizo=False):
+    """Chave estável: ignora filtros vazios e a ordem dos valores escolhidos."""
+    filtros = tuple(sorted(
+        (coluna, tuple(sorted(map(str, valores))))
+        for coluna, valores in selecao.items() if len(valores)
+    ))
+    return (tipo, chave_dataset, filtros, bool(apenas_prejuizo))
+
+
+def _tamanho_mb(valor):
+    if isinstance(valor, pd.DataFrame):
+        return valor.memory_usage(deep=True).sum() / 1024 ** 2
+    if isinstance(valor, (tuple, list)):
+        return sum(_tamanho_mb(v) for v in valor)
+    # dicionário de totais e afins: desprezível perto das tabelas
+    return 0.001
+
+
+class CacheAgregados:
+    """LRU de resultados de agregação com orçamento de memória."""
+
+    def __init__(self, limite_mb=LIMITE_AGREGADOS_MB, nome='agregados', medir=_tamanho_mb):
+        self.limite_mb = limite_mb
+        self.nome = nome
+        # medir(valor) devolve o tamanho em MB de um resultado guardado
+        self.medir = medir
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._ocupado_mb = 0.0
+        # Sessões do Streamlit rodam em threads e compartilham o cache
+        self._trava = threading.Lock()
+
+    def obter(self, chave, calcular):
+        """Devolve o resultado guardado ou calcula, guarda e devolve.
+
+        O resultado é compartilhado entre execuções: não deve ser alterado.
+        """
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave][0]
+            self.faltas += 1
+
+        valor = calcular()
+        tamanho = self.medir(valor)
+        if tamanho > self.limite_mb:
+            return valor
+
+        with self._trava:
+            if chave not in self._itens:
+                self._itens[chave] = (valor, tamanho)
+                self._ocupado_mb += tamanho
+            while self._ocupado_mb > self.limite_mb:
+                _, (_, liberado) = self._itens.popitem(last=False)
+                self._ocupado_mb -= liberado
+        return valor
+
+    def resumo(self):
+        return (
+            f"Cache de {self.nome}: {self.acertos} acertos, {self.faltas} faltas, "
+            f"{self._ocupado_mb:,.1f} de {self.limite_mb:,} MB"
+        )
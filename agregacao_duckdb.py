@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import duckdb
+
+from agregacao import CHAVES_CUBO, COLUNAS_TOTAIS
+
+# --------------------------------------------------
+# BACKEND DUCKDB
+# --------------------------------------------------
+# Mesmo contrato do AgregadorPandas (totais e cubo), executado em SQL.
+# Com arquivo, a planilha é gravada uma vez numa tabela do .duckdb e as
+# consultas usam todos os núcleos e podem transbordar para disco; sem
+# arquivo, o DataFrame (ex.: um recorte filtrado) é lido direto da memória.
+
+
+def _q(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def _soma(expressao):
+    # SUM de um grupo só com NULL é NULL no SQL e 0 no pandas
+    return f'COALESCE(SUM({expressao}), 0)'
+
+
+class AgregadorDuckDB:
+
+    def __init__(self, df, arquivo=None):
+        self.colunas = list(df.columns)
+        if arquivo is None:
+            self.con = duckdb.connect()
+            self.con.register('itens', df)
+            return
+
+        Path(arquivo).parent.mkdir(parents=True, exist_ok=True)
+        self.con = duckdb.connect(str(arquivo))
+        existe = self.con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'itens'"
+        ).fetchone()[0]
+        if not existe:
+            self.con.register('origem', df)
+            self.con.execute('CREATE TABLE itens AS SELECT * FROM origem')
+            self.con.unregister('origem')
+
+    def totais(self):
+        selecao = ', '.join(
+            f'{_soma(f"CAST({_q(c)} AS DOUBLE)")} AS {_q(c)}' for c in COLUNAS_TOTAIS
+        )
+        linha = self.con.execute(f'SELECT {selecao} FROM itens').fetchone()
+        return dict(zip(COLUNAS_TOTAIS, (float(v) for v in linha)))
+
+    def cubo(self):
+        chaves = ', '.join(_q(c) for c in CHAVES_CUBO if c in self.colunas)
+
+        if 'Margem Unitária' in self.colunas:
+            margem = 'CAST("Margem Unitária" AS DOUBLE)'
+        else:
+            margem = '(CAST("Valor Unitário Bruto" AS DOUBLE) - CAST("Custo Gerencial" AS DOUBLE))'
+
+        if 'Prejuízo Total' in self.colunas:
+            prejuizo = 'CAST("Prejuízo Total" AS DOUBLE)'
+        else:
+            prejuizo = '(margem * CAST("Quantidade" AS DOUBLE))'
+
+        return self.con.execute(f"""
+            WITH base AS (
+                SELECT *, {margem} AS margem FROM itens
+            ), linhas AS (
+                SELECT *, {prejuizo} AS prejuizo FROM base
+            )
+            SELECT
+                {chaves},
+                {_soma('CAST("Valor Total Liquido" AS DOUBLE)')} AS "Valor Total Liquido",
+                {_soma('CAST("Lucro" AS DOUBLE)')} AS "Lucro",
+                {_soma('CAST("Quantidade" AS DOUBLE)')} AS "Quantidade",
+                {_soma('prejuizo')} AS "Prejuízo Total",
+                {_soma('margem')} AS "Margem Unitária",
+                {_soma('CASE WHEN margem < 0 THEN margem ELSE 0 END')} AS "Margem Negativa",
+                CAST(COUNT(*) FILTER (WHERE margem < 0) AS BIGINT) AS "Linhas com Prejuízo",
+                {_soma('CASE WHEN prejuizo < 0 THEN prejuizo ELSE 0 END')} AS "Prejuízo Negativo",
+                CAST(COUNT(margem) AS BIGINT) AS "Linhas"
+            FROM linhas
+            GROUP BY {chaves}
+        """).fetchdf()
@@ -1,49 +1,77 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
-import plotly.express as px
+
+from perfil import PerfilSecoes, exibir_perfil, perfil_solicitado
 
 st.set_page_config(layout="wide")
 
+
+# Contagem guardada pelo hash dos arquivos: reexecuções por widgets não
+# sobem processos nem releem os CSVs. O resultado é compartilhado entre
+# sessões e não deve ser alterado.
+@st.cache_resource(max_entries=3)
+def contar_uploads(_conteudos, chave):
+    return contar_arquivos(_conteudos)
+
+
+# Trocar período ou dimensão reexecuta só este trecho, sem recontar os arquivos
+@st.fragment
+def painel_periodos(contagem):
+    st.subheader('Movimento ao longo do tempo')
+
+    col_periodo, col_dimensao = st.columns(2)
+    periodo = col_periodo.radio('Período', list(FREQUENCIAS), index=1, horizontal=True)
+    dimensao = col_dimensao.selectbox('Abrir por', DIMENSOES_TEMPO)
+
+    st.line_chart(movimentos_por_periodo(contagem, dimensao, periodo))
+
+    st.subheader('Movimentos por hora do dia (todos os caixas)')
+    st.caption('Média e pico por hora no período enviado, para dimensionar a escala.')
+    st.bar_chart(movimentos_por_hora_do_dia(contagem), stack=False)
+
+
 # Bloco de upload
 st.title('Análise de venda por PDV Grupo Adão e Eva')
-st.write('Faça o upload do arquivo CSV para iniciar a análise.')
+st.write('Faça o upload dos arquivos CSV (um por PDV) para iniciar a análise.')
 
-uploaded_file = st.file_uploader("Escolha o arquivo CSV", type="csv")
+uploaded_files = st.file_uploader(
+    "Escolha os arquivos CSV", type="csv", accept_multiple_files=True
+)
 
-if uploaded_file is not None:
-    with st.spinner('Carregando e processando os dados...'):
-        data = pd.read_csv(uploaded_file, sep=',')
+if uploaded_files:
+    from movimento import (
+        DIMENSOES_TEMPO, FORMATO_DATA, FREQUENCIAS, chave_arquivos, contar_arquivos,
+        legenda_top_k, movimentos_por_hora_do_dia, movimentos_por_periodo, tabela_contagem,
+    )
 
-        data = data.drop(columns=[
-            'idcaixa', 'idusuario', 'tipomovimento',
-            'idabertura', 'idrecebimento', 'vallancamento',
-            'valreforcocx', 'tiporeforco'
-        ])
+    perfil = PerfilSecoes("analise.py", perfil_solicitado(st.query_params))
+    perfil.secao("Carga e Contagem")
+
+    with st.spinner('Carregando e processando os dados...'):
+        # Cada arquivo é lido em blocos num processo próprio; as contagens
+        # parciais são somadas no final
+        conteudos = [arquivo.getvalue() for arquivo in uploaded_files]
+        contagem = contar_uploads(conteudos, chave_arquivos(conteudos))
 
-        data = data.rename(columns={
-            'idempresa': 'Caixa',
-            'descrrecebimento': 'Forma de Pagamento',
-            'dtmovimento': 'Data Movimento',
-            'nomeusuario': 'Nome Usuario'
-        })
+        contagem_usuarios = tabela_contagem(contagem.usuarios, 'Nome Usuario')
 
-        contagem_usuarios = data['Nome Usuario'].value_counts().reset_index()
-        contagem_usuarios.columns = ['Nome Usuario', 'Quantidade']
+        # TROCO já fica fora do ranking na contagem
+        contagem_forma_pagamento = tabela_contagem(contagem.formas_pagamento, 'Forma de Pagamento')
 
-        contagem_forma_pagamento = data['Forma de Pagamento'].value_counts().reset_index()
-        contagem_forma_pagamento.columns = ['Forma de Pagamento', 'Quantidade']
-        contagem_forma_pagamento = contagem_forma_pagamento[contagem_forma_pagamento['Forma de Pagamento'] != 'TROCO']
+        contagem_pix_tef_operador = tabela_contagem(contagem.pix_tef_operador, 'Nome Usuario')
 
-        dados_pix_tef = data[data['Forma de Pagamento'] == 'PIX TEF']
-        contagem_pix_tef_operador = dados_pix_tef['Nome Usuario'].value_counts().reset_index()
-        contagem_pix_tef_operador.columns = ['Nome Usuario', 'Quantidade']
+        total_vendas = contagem.total_vendas
 
-        total_vendas = len(data)
+    legenda = legenda_top_k(contagem)
+    if legenda:
+        st.caption(legenda)
 
     # --------------------------------------
     # GRÁFICOS
     # --------------------------------------
+    perfil.secao("Gráficos", total_vendas)
+    import altair as alt
+    import plotly.express as px
+
     col1, col2 = st.columns(2)
     col3, col4 = st.columns(2)
 
@@ -75,13 +103,25 @@ if uploaded_file is not None:
     col3.plotly_chart(fig_plotly, use_container_width=True)
     col4.altair_chart(grafico_pix_tef_operador, use_container_width=True)
 
-    st.bar_chart(data['Caixa'].value_counts())
+    st.bar_chart(contagem.caixas.sort_values(ascending=False))
         
     #somando o total de vendas de todos os caixas
-    total_vendas_caixas = data['Caixa'].value_counts().sum()
+    total_vendas_caixas = contagem.total_vendas
     st.subheader(f'Total de vendas: {total_vendas_caixas:}');
+
+    perfil.secao("Movimento por Período", total_vendas)
+    if contagem.datas_invalidas:
+        st.warning(
+            f'{contagem.datas_invalidas:,} de {total_vendas:,} movimentos sem data/hora '
+            f'no formato {FORMATO_DATA} (coluna dtmovimento) ficaram fora dos gráficos '
+            'ao longo do tempo.'
+        )
+    painel_periodos(contagem)
+
     st.success('Gráficos gerados com sucesso!')
+
+    exibir_perfil(perfil.encerrar(), st.sidebar)
 else:
-    st.warning("Envie um arquivo CSV para visualizar a análise.")
+    st.warning("Envie um ou mais arquivos CSV para visualizar a análise.")
 
 st.markdown("""Desenvolvido por [Rodrigo Souza](https://www.linkedin.com/in/rodrigo-souza-5b9016aa/)""")
\ No newline at end of file
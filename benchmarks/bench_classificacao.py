@@ -0,0 +1,85 @@
+"""Compara a classificação ABC / Matriz Estratégica via apply com a vetorizada.
+
+Uso: python benchmarks/bench_classificacao.py [n_produtos ...]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from classificacao import classificar_abc, classificar_matriz  # noqa: E402
+
+TAMANHOS = [10_000, 100_000, 1_000_000]
+
+
+# --------------------------------------------------
+# IMPLEMENTAÇÃO ANTERIOR (linha a linha)
+# --------------------------------------------------
+def abc_apply(p):
+    if p <= 80:
+        return 'A'
+    elif p <= 95:
+        return 'B'
+    else:
+        return 'C'
+
+
+def matriz_apply(df_prod, venda_mediana, margem_mediana):
+    def classificar(row):
+        if row["Valor Total Liquido"] >= venda_mediana and row["Margem %"] >= margem_mediana:
+            return "⭐ Estrela"
+        elif row["Valor Total Liquido"] >= venda_mediana and row["Margem %"] < margem_mediana:
+            return "🐄 Caixa"
+        elif row["Valor Total Liquido"] < venda_mediana and row["Margem %"] >= margem_mediana:
+            return "🚀 Oportunidade"
+        else:
+            return "⚠ Problema"
+
+    return df_prod.apply(classificar, axis=1)
+
+
+def gerar_produtos(n, semente=0):
+    rng = np.random.default_rng(semente)
+    venda = np.sort(rng.pareto(1.2, n) * 1000)[::-1]
+    return pd.DataFrame({
+        "Valor Total Liquido": venda,
+        "% Acumulado": venda.cumsum() / venda.sum() * 100,
+        "Margem %": rng.normal(20, 15, n),
+    })
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main(tamanhos):
+    print(f"{'produtos':>10} {'etapa':>8} {'apply (s)':>10} {'vetor (s)':>10} {'ganho':>8}")
+    for n in tamanhos:
+        df_prod = gerar_produtos(n)
+        venda_mediana = df_prod["Valor Total Liquido"].median()
+        margem_mediana = df_prod["Margem %"].median()
+
+        t_antigo, antigo = cronometrar(lambda: df_prod["% Acumulado"].apply(abc_apply))
+        t_novo, novo = cronometrar(lambda: classificar_abc(df_prod["% Acumulado"]))
+        assert (antigo.to_numpy() == novo).all()
+        print(f"{n:>10} {'ABC':>8} {t_antigo:>10.4f} {t_novo:>10.4f} {t_antigo / t_novo:>7.1f}x")
+
+        t_antigo, antigo = cronometrar(
+            lambda: matriz_apply(df_prod, venda_mediana, margem_mediana)
+        )
+        t_novo, novo = cronometrar(lambda: classificar_matriz(
+            df_prod["Valor Total Liquido"], df_prod["Margem %"],
+            venda_corte=venda_mediana, margem_corte=margem_mediana,
+        ))
+        assert (antigo.to_numpy() == novo).all()
+        print(f"{n:>10} {'Matriz':>8} {t_antigo:>10.4f} {t_novo:>10.4f} {t_antigo / t_novo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or TAMANHOS)
@@ -0,0 +1,77 @@
+"""Compara a cadeia antiga de colunas derivadas com adicionar_colunas_derivadas.
+
+A cadeia antiga é a dos apps antes da função compartilhada: Margem Unitária,
+Prejuízo Total e Markup como colunas pandas em sequência (sem proteção para
+custo zero) e o Status por apply linha a linha.
+
+Uso: python benchmarks/bench_derivadas.py [n_linhas ...]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from derivadas import NUMEXPR, adicionar_colunas_derivadas  # noqa: E402
+
+TAMANHOS = [1_000_000, 10_000_000]
+
+
+# --------------------------------------------------
+# IMPLEMENTAÇÃO ANTERIOR
+# --------------------------------------------------
+def cadeia_antiga(df):
+    df['Margem Unitária'] = df['Valor Unitário Bruto'] - df['Custo Gerencial']
+    df['Prejuízo Total'] = df['Margem Unitária'] * df['Quantidade']
+    df['Markup'] = df['Valor Unitário Bruto'] / df['Custo Gerencial']
+    df['Status'] = df['Margem Unitária'].apply(
+        lambda x: "Prejuízo" if x < 0 else "Saudável"
+    )
+    return df
+
+
+def gerar_itens(n, semente=0):
+    # Só as colunas usadas, já no esquema da carga (float64)
+    rng = np.random.default_rng(semente)
+    preco = rng.lognormal(2.3, 0.8, n)
+    custo = preco / rng.normal(1.3, 0.15, n)
+    custo[rng.random(n) < 0.001] = 0
+    return pd.DataFrame({
+        'Valor Unitário Bruto': preco,
+        'Custo Gerencial': custo,
+        'Quantidade': rng.integers(1, 7, n).astype('int8'),
+    })
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main(tamanhos):
+    motores = [('numpy', None)] + ([('numexpr', NUMEXPR)] if NUMEXPR else [])
+    print(f"{'linhas':>11} {'versão':>14} {'tempo (s)':>10} {'ganho':>8}")
+    for n in tamanhos:
+        base = gerar_itens(n)
+
+        t_antigo, antigo = cronometrar(lambda: cadeia_antiga(base.copy()))
+        print(f"{n:>11,} {'cadeia antiga':>14} {t_antigo:>10.3f}")
+
+        for nome, motor in motores:
+            t_novo, novo = cronometrar(lambda: adicionar_colunas_derivadas(base.copy(), motor))
+            assert np.array_equal(antigo['Margem Unitária'], novo['Margem Unitária'], equal_nan=True)
+            assert np.array_equal(antigo['Prejuízo Total'], novo['Prejuízo Total'], equal_nan=True)
+            assert (antigo['Status'] == novo['Status'].astype(str)).all()
+            # Custo zero: antes inf, agora NaN
+            finito = np.isfinite(antigo['Markup'])
+            assert np.array_equal(antigo['Markup'][finito], novo['Markup'][finito])
+            assert novo['Markup'][~finito].isna().all()
+            print(f"{n:>11,} {nome:>14} {t_novo:>10.3f} {t_antigo / t_novo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or TAMANHOS)
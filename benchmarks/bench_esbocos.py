@@ -0,0 +1,66 @@
+"""Erro e custo dos esboços (esbocos.py) frente ao cálculo exato.
+
+Os valores chegam em blocos, como numa leitura em streaming, e metade dos
+blocos vai para um segundo esboço que é somado no final.
+
+Uso: python benchmarks/bench_esbocos.py --linhas 1000000 10000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esbocos import ContagemDistinta, EsbocoQuantis  # noqa: E402
+
+BLOCOS = 20
+QUANTIS = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def medir(n, rng):
+    produtos = pd.Series(pd.Categorical(
+        np.char.add('PRODUTO ', rng.integers(0, max(n // 20, 1), n).astype(str))
+    ))
+    valores = rng.lognormal(3.0, 1.0, n)
+
+    inicio = time.perf_counter()
+    distintos = [ContagemDistinta(), ContagemDistinta()]
+    quantis = [EsbocoQuantis(), EsbocoQuantis()]
+    for i, bloco in enumerate(np.array_split(np.arange(n), BLOCOS)):
+        distintos[i % 2].atualizar(produtos.iloc[bloco])
+        quantis[i % 2].atualizar(valores[bloco])
+    distintos[0].somar(distintos[1])
+    quantis[0].somar(quantis[1])
+    segundos = time.perf_counter() - inicio
+
+    exato = produtos.nunique()
+    estimado = distintos[0].estimativa()
+    print(f'\n{n:,} linhas em {BLOCOS} blocos: {segundos:.3f}s')
+    print(f'  distintos: exato {exato:,}  estimado {estimado:,.0f}  '
+          f'erro {(estimado / exato - 1) * 100:+.2f}%')
+
+    amostras = sum(len(nivel) for nivel in quantis[0].niveis)
+    print(f'  quantis ({amostras:,} amostras guardadas):')
+    ordenados = np.sort(valores)
+    for q, v in zip(QUANTIS, quantis[0].quantis(QUANTIS)):
+        posicao = np.searchsorted(ordenados, v) / n
+        print(f'    q={q:.2f}  estimado {v:10.2f}  exato {np.quantile(valores, q):10.2f}  '
+              f'erro de posição {(posicao - q) * 100:+.2f} p.p.')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Erro dos esboços.')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    for n in args.linhas:
+        medir(n, rng)
+
+
+if __name__ == '__main__':
+    main()
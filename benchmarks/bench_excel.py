@@ -0,0 +1,63 @@
+"""Compara a leitura da planilha gerencial: completa x só as colunas usadas.
+
+Uso: python benchmarks/bench_excel.py --linhas 10000 100000
+"""
+import argparse
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from carga import ler_excel, tratar_planilha  # noqa: E402
+from gerar_dados import gerar_itens  # noqa: E402
+
+
+def medir(nome, funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    print(f'{nome:<32} {segundos:9.3f}s {pico:10.1f} MB')
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Leitura da planilha gerencial.')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args(argv)
+
+    for n in args.linhas:
+        buffer = io.BytesIO()
+        gerar_itens(n).to_excel(buffer, index=False)
+        conteudo = buffer.getvalue()
+        print(f'\n{n:,} linhas ({len(conteudo) / 1024 ** 2:.1f} MB de .xlsx)')
+
+        base = medir('read_excel completo (openpyxl)', lambda: tratar_planilha(
+            pd.read_excel(io.BytesIO(conteudo))
+        ))
+        colunas = medir('colunas usadas (openpyxl)', lambda: tratar_planilha(
+            ler_excel(conteudo, motor=None)
+        ))
+        pd.testing.assert_frame_equal(base, colunas)
+
+        try:
+            import python_calamine  # noqa: F401
+        except ImportError:
+            print('python-calamine não instalado; motor calamine ignorado')
+            continue
+        rapido = medir('colunas usadas (calamine)', lambda: tratar_planilha(
+            ler_excel(conteudo, motor='calamine')
+        ))
+        pd.testing.assert_frame_equal(base, rapido)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Tempo de importação da página inicial de cada app (python -X importtime).
+
+A página inicial é o que o app executa antes do upload: os imports de nível
+de módulo. pandas, numpy, pyarrow, plotly e altair devem ficar fora dela; o
+script termina com código 1 se algum aparecer. Para comparação mede também
+todos os imports do app, o custo pago depois do upload.
+
+O streamlit é importado antes da marcação e não entra na conta. Sem ele
+instalado, a medição segue só com os módulos do projeto, e o que depende
+dele (ex.: carteira.py, após o upload) aparece como n/d.
+
+Uso: python benchmarks/bench_inicio.py [app.py ...]
+"""
+import argparse
+import ast
+import importlib.util
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+APPS = ['venda.py', 'vendaCEO.py', 'vendaESTRATEGICA.py', 'analise.py']
+PESADOS = ['pandas', 'numpy', 'pyarrow', 'plotly', 'altair', 'duckdb']
+REPETICOES = 3
+
+MARCA = '--pagina-inicial--'
+# "import time: self [us] | cumulative | pacote", recuado por nível
+LINHA = re.compile(r'import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)')
+
+
+def imports_do_app(caminho):
+    """Imports da página inicial e todos os imports do app, como código."""
+    arvore = ast.parse(caminho.read_text(encoding='utf-8'))
+
+    def fonte(nos):
+        nos = [no for no in nos if isinstance(no, (ast.Import, ast.ImportFrom))]
+        return list(dict.fromkeys(ast.unparse(no) for no in sorted(nos, key=lambda no: no.lineno)))
+
+    return fonte(arvore.body), fonte(ast.walk(arvore))
+
+
+def _streamlit(linha):
+    return re.match(r'(import|from) streamlit\b', linha) is not None
+
+
+def medir(imports):
+    """Milissegundos de importação e pacotes carregados depois da marcação."""
+    base = [linha for linha in imports if _streamlit(linha)]
+    if importlib.util.find_spec('streamlit') is None:
+        base = []
+    resto = [linha for linha in imports if not _streamlit(linha)]
+    codigo = '\n'.join(base + ['import sys', f'sys.stderr.write({MARCA!r} + "\\n")'] + resto)
+
+    saida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=RAIZ, capture_output=True, text=True,
+    )
+    if saida.returncode != 0:
+        erro = saida.stderr.strip().splitlines()[-1]
+        if "No module named 'streamlit'" in erro:
+            return None, set()
+        raise SystemExit(erro)
+
+    total, pacotes = 0, set()
+    for linha in saida.stderr.split(MARCA, 1)[1].splitlines():
+        encontrada = LINHA.match(linha)
+        if not encontrada:
+            continue
+        acumulado, recuo, modulo = encontrada.groups()
+        pacotes.add(modulo.split('.')[0])
+        # Só o primeiro nível: os aninhados já estão no acumulado do pai
+        if len(recuo) == 1:
+            total += int(acumulado)
+    return total / 1000, pacotes
+
+
+def melhor_de(imports, repeticoes):
+    # A primeira execução pode incluir a compilação dos .pyc
+    medicoes = [medir(imports) for _ in range(repeticoes)]
+    if medicoes[0][0] is None:
+        return None, set()
+    return min(ms for ms, _ in medicoes), medicoes[0][1]
+
+
+def _ms(valor, largura):
+    return f'{valor:{largura}.1f}' if valor is not None else f"{'n/d':>{largura}}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tempo de importação dos apps.')
+    parser.add_argument('apps', nargs='*', default=APPS)
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES)
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec('streamlit') is None:
+        print('streamlit não instalado: medindo só os módulos do projeto\n')
+
+    print(f"{'app':>19} {'inicial (ms)':>13} {'após upload (ms)':>17}  pesados na página inicial")
+    falhas = []
+    for app in args.apps:
+        inicio, todos = imports_do_app(RAIZ / app)
+        ms_inicio, pacotes = melhor_de(inicio, args.repeticoes)
+        ms_todos, _ = melhor_de(todos, args.repeticoes)
+        pesados = [p for p in PESADOS if p in pacotes]
+        if pesados:
+            falhas.append(app)
+        print(f"{app:>19} {_ms(ms_inicio, 13)} {_ms(ms_todos, 17)}  {', '.join(pesados) or '-'}")
+
+    if falhas:
+        print(f"\nBibliotecas pesadas na página inicial de: {', '.join(falhas)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Confere que os backends pandas e DuckDB produzem os mesmos números.
+
+Roda KPIs, cubo, rankings, curva ABC e margem por Grupo nos dois backends
+sobre uma planilha sintética e falha se algum valor divergir além de meio
+centavo (a ordem das somas em ponto flutuante não é a mesma).
+A paridade em casos menores (registro em memória, recortes filtrados, chaves
+vazias) é conferida em tests/test_agregacao_duckdb.py; este script mede o
+tempo dos dois backends num volume grande.
+
+Uso: python benchmarks/comparar_backends.py [n_linhas]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agregacao import (  # noqa: E402
+    criar_agregador, impacto_prejuizo, por_dimensao, por_produto,
+    produtos_com_prejuizo, ranking,
+)
+from carga import tratar_planilha  # noqa: E402
+from classificacao import curva_abc  # noqa: E402
+from derivadas import adicionar_colunas_derivadas  # noqa: E402
+from gerar_dados import gerar_itens  # noqa: E402
+
+TOLERANCIA = 0.005
+
+
+def gerar_itens_tratados(n):
+    return adicionar_colunas_derivadas(tratar_planilha(gerar_itens(n)))
+
+
+def relatorio(df, backend, arquivo=None):
+    agregador = criar_agregador(df, arquivo, backend=backend)
+    cubo = agregador.cubo()
+    produtos = por_produto(cubo)
+    abc = curva_abc(ranking(produtos, 'Valor Total Liquido', n=None))
+    return {
+        'totais': pd.Series(agregador.totais()),
+        'indicadores': pd.Series({
+            'produtos': len(produtos),
+            'produtos_prejuizo': produtos_com_prejuizo(produtos),
+            'impacto_prejuizo': impacto_prejuizo(cubo),
+        }),
+        'produtos': produtos.set_index('DESCRICAO').sort_index(),
+        'top_lucro': ranking(produtos, 'Lucro').set_index('DESCRICAO'),
+        'piores': ranking(produtos, 'Prejuízo Total', crescente=True).set_index('DESCRICAO'),
+        'abc': abc.set_index('DESCRICAO').sort_index(),
+        'grupo': por_dimensao(cubo, 'Grupo').set_index('Grupo').sort_index(),
+    }
+
+
+def comparar(esperado, obtido):
+    divergencias = []
+    for nome, tabela in esperado.items():
+        outra = obtido[nome]
+        if isinstance(tabela, pd.DataFrame):
+            if not tabela.index.equals(outra.index):
+                divergencias.append(f'{nome}: linhas diferentes')
+                continue
+            for coluna in tabela.columns:
+                a, b = tabela[coluna], outra[coluna]
+                if pd.api.types.is_numeric_dtype(a):
+                    ok = np.allclose(a, b, rtol=0, atol=TOLERANCIA, equal_nan=True)
+                else:
+                    ok = a.equals(b)
+                if not ok:
+                    divergencias.append(f'{nome}.{coluna}')
+        elif not np.allclose(tabela, outra.reindex(tabela.index), rtol=0, atol=TOLERANCIA):
+            divergencias.append(nome)
+    return divergencias
+
+
+def main(n):
+    df = gerar_itens_tratados(n)
+    inicio = time.perf_counter()
+    esperado = relatorio(df, 'pandas')
+    t_pandas = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        inicio = time.perf_counter()
+        obtido = relatorio(df, 'duckdb', Path(diretorio) / 'itens.duckdb')
+        t_duckdb = time.perf_counter() - inicio
+
+    divergencias = comparar(esperado, obtido)
+    print(f'{n:,} linhas: pandas {t_pandas:.3f}s, duckdb {t_duckdb:.3f}s')
+    if divergencias:
+        print('Divergências:', ', '.join(divergencias))
+        return 1
+    print('Backends conferem.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
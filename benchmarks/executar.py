@@ -0,0 +1,339 @@
+"""Mede carga, filtros, agregações e gráficos dos quatro dashboards.
+
+Para cada tamanho, gera a exportação sintética em memória e cronometra as
+mesmas etapas que venda.py, vendaCEO.py, vendaESTRATEGICA.py e analise.py
+executam a cada rerun, registrando tempo e pico de memória de cada uma.
+Com --dados, usa os arquivos gravados por gerar_dados.py nesse diretório
+(itens_<n>.parquet, itens_<n>.xlsx e movimentos_<n>.csv); o que faltar é
+gerado. O resultado vai para benchmarks/resultados/<data>.json; com
+--comparar, as etapas são confrontadas com uma execução anterior.
+
+Uso:
+    python benchmarks/executar.py --linhas 10000 1000000
+    python benchmarks/executar.py --linhas 10000000 --dados dados/
+    python benchmarks/executar.py --linhas 1000000 --comparar benchmarks/resultados/base.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import altair as alt
+import pandas as pd
+import plotly.express as px
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from agregacao import (  # noqa: E402
+    CacheAgregados, criar_agregador, por_dimensao, por_produto, ranking,
+)
+from carga import CacheColunar, carregar_planilha, tratar_planilha  # noqa: E402
+from classificacao import curva_abc  # noqa: E402
+from derivadas import adicionar_colunas_derivadas  # noqa: E402
+from filtros import IndiceFiltros  # noqa: E402
+from gerar_dados import LIMITE_EXCEL, gerar_itens, gerar_movimentos  # noqa: E402
+from graficos import (  # noqa: E402
+    LIMITE_PONTOS, MODO_AMOSTRA, MODO_PONTOS, figura_dispersao, figura_em_cache,
+)
+from indicadores import indicadores_carteira, margem_por, matriz_estrategica  # noqa: E402
+from movimento import (  # noqa: E402
+    DIMENSOES_TEMPO, FREQUENCIAS, contar_movimentos, movimentos_por_hora_do_dia,
+    movimentos_por_periodo, tabela_contagem,
+)
+
+DIRETORIO_RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+LINHAS_PADRAO = [10_000, 1_000_000]
+# Diferença acima disso (em %) é sinalizada na comparação
+LIMIAR_REGRESSAO = 20
+
+
+# --------------------------------------------------
+# MEDIÇÃO
+# --------------------------------------------------
+class Medidor:
+
+    def __init__(self, medir_memoria=True):
+        self.medir_memoria = medir_memoria
+        self.resultados = []
+
+    @contextmanager
+    def etapa(self, app, nome, linhas):
+        if self.medir_memoria:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        inicio = time.perf_counter()
+        yield
+        segundos = time.perf_counter() - inicio
+        pico = None
+        if self.medir_memoria:
+            pico = (tracemalloc.get_traced_memory()[1] - base) / 1024 ** 2
+        self.resultados.append({
+            'app': app, 'etapa': nome, 'linhas': linhas,
+            'segundos': segundos, 'pico_mb': pico,
+        })
+        memoria = f'{pico:10.1f} MB' if pico is not None else ''
+        print(f'{app:>19} {nome:<28} {linhas:>11,} {segundos:10.3f}s {memoria}')
+
+
+def _serializar(*figuras):
+    # O Streamlit envia o JSON da figura; serializar faz parte do custo
+    for figura in figuras:
+        figura.to_json()
+
+
+def _em_cache(cache, *graficos):
+    # Cada gráfico é (tabela, tipo, construir); a etapa mede os acertos,
+    # que o Streamlit ainda serializa para enviar
+    for tabela, tipo, construir in graficos:
+        _serializar(figura_em_cache(tabela, tipo, construir, cache))
+
+
+def _barra(tabela, x, y, escala=None):
+    return px.bar(tabela, x=x, y=y, orientation='h', color=x, color_continuous_scale=escala)
+
+
+# --------------------------------------------------
+# ETAPAS POR APP
+# --------------------------------------------------
+def _arquivo(dados, nome):
+    # Arquivo de gerar_dados.py, se --dados foi informado e ele existe
+    if dados is None:
+        return None
+    caminho = Path(dados) / nome
+    return caminho if caminho.exists() else None
+
+
+def ler_itens(n, dados=None):
+    parquet = _arquivo(dados, f'itens_{n}.parquet')
+    return pd.read_parquet(parquet) if parquet else gerar_itens(n)
+
+
+def medir_carga(medidor, bruto, n, dados=None):
+    with tempfile.TemporaryDirectory() as diretorio:
+        if n <= LIMITE_EXCEL:
+            planilha = _arquivo(dados, f'itens_{n}.xlsx')
+            if planilha is None:
+                planilha = Path(diretorio) / 'itens.xlsx'
+                bruto.to_excel(planilha, index=False)
+            conteudo = planilha.read_bytes()
+            cache = CacheColunar(Path(diretorio) / 'cache')
+            with medidor.etapa('carga', 'read_excel + parquet', n):
+                carregar_planilha(conteudo, cache)
+            with medidor.etapa('carga', 'cache parquet', n):
+                carregar_planilha(conteudo, cache)
+
+        with medidor.etapa('carga', 'tratamento + esquema', n):
+            data = tratar_planilha(bruto)
+    return data
+
+
+def medir_venda(medidor, data, n):
+    app = 'venda.py'
+    with medidor.etapa(app, 'colunas derivadas', n):
+        data = adicionar_colunas_derivadas(data)
+    with medidor.etapa(app, 'indice de filtros', n):
+        indice = IndiceFiltros(data, ['DESCRICAO', 'Seção', 'Grupo'])
+
+    grupos = data['Grupo'].value_counts().index[:3].tolist()
+    with medidor.etapa(app, 'filtro Grupo', n):
+        df_filtrado = indice.filtrar(data, {'Grupo': grupos})
+
+    m = len(df_filtrado)
+    with medidor.etapa(app, 'resumo geral', m):
+        criar_agregador(df_filtrado).totais()
+    with medidor.etapa(app, 'cubo de produtos', m):
+        cubo = criar_agregador(df_filtrado).cubo()
+        produtos = por_produto(cubo)
+    with medidor.etapa(app, 'rankings e margens', m):
+        top = ranking(produtos, 'Valor Total Liquido')
+        piores = ranking(produtos, 'Valor Total Liquido', crescente=True)
+        prejuizos = ranking(produtos, 'Margem Negativa Média', crescente=True)
+        secao = por_dimensao(cubo, 'Seção')
+        grupo = por_dimensao(cubo, 'Grupo')
+    with medidor.etapa(app, 'graficos', m):
+        _serializar(
+            _barra(top, 'Valor Total Liquido', 'DESCRICAO', 'Blues'),
+            _barra(piores, 'Valor Total Liquido', 'DESCRICAO', 'Reds'),
+            _barra(prejuizos, 'Margem Negativa Média', 'DESCRICAO', 'Reds'),
+            px.pie(secao, names='Seção', values='Lucro', hole=0.4),
+            px.pie(grupo, names='Grupo', values='Lucro', hole=0.4),
+        )
+    graficos = [
+        (top, 'top', lambda: _barra(top, 'Valor Total Liquido', 'DESCRICAO', 'Blues')),
+        (piores, 'piores', lambda: _barra(piores, 'Valor Total Liquido', 'DESCRICAO', 'Reds')),
+        (prejuizos, 'ranking_prejuizo',
+         lambda: _barra(prejuizos, 'Margem Negativa Média', 'DESCRICAO', 'Reds')),
+        (secao, 'pizza', lambda: px.pie(secao, names='Seção', values='Lucro', hole=0.4)),
+        (grupo, 'pizza', lambda: px.pie(grupo, names='Grupo', values='Lucro', hole=0.4)),
+    ]
+    cache = CacheAgregados(nome='figuras')
+    _em_cache(cache, *graficos)
+    with medidor.etapa(app, 'graficos (cache)', m):
+        _em_cache(cache, *graficos)
+
+    df_scatter = df_filtrado.loc[
+        (df_filtrado['Valor Unitário Bruto'] > 0) & (df_filtrado['Custo Gerencial'] > 0),
+        ['Valor Unitário Bruto', 'Custo Gerencial', 'Grupo', 'DESCRICAO', 'Lucro'],
+    ]
+    modo = MODO_PONTOS if len(df_scatter) <= LIMITE_PONTOS else MODO_AMOSTRA
+    with medidor.etapa(app, f'dispersao ({modo})', len(df_scatter)):
+        _serializar(figura_dispersao(df_scatter, modo))
+    return data
+
+
+def medir_carteira(medidor, data, n, app, matriz):
+    with medidor.etapa(app, 'totais + cubo', n):
+        agregador = criar_agregador(data)
+        totais = agregador.totais()
+        cubo = agregador.cubo()
+        produtos = por_produto(cubo)
+    with medidor.etapa(app, 'visao executiva', n):
+        indicadores_carteira(totais, cubo, produtos)
+    with medidor.etapa(app, 'curva ABC', n):
+        abc = curva_abc(ranking(produtos, 'Valor Total Liquido', n=None))
+    with medidor.etapa(app, 'rankings e margens', n):
+        top = ranking(produtos, 'Lucro')
+        piores = ranking(produtos, 'Prejuízo Total', crescente=True)
+        grupo = margem_por(cubo, 'Grupo')
+
+    if matriz:
+        with medidor.etapa(app, 'matriz estrategica', n):
+            df_prod = matriz_estrategica(produtos)
+
+    with medidor.etapa(app, 'graficos', n):
+        figuras = [
+            px.bar(abc.head(30), x='DESCRICAO', y='% Acumulado', color='Classe ABC'),
+            _barra(top, 'Lucro', 'DESCRICAO'),
+            _barra(piores, 'Prejuízo Total', 'DESCRICAO', 'Reds'),
+            px.bar(grupo, x='Grupo', y='Margem %', color='Margem %'),
+        ]
+        if matriz:
+            figuras.append(px.scatter(
+                df_prod, x='Valor Total Liquido', y='Margem %',
+                color='Categoria Estratégica', size='Quantidade Ajustada',
+                hover_data=['DESCRICAO'],
+            ))
+        _serializar(*figuras)
+
+
+def medir_analise(medidor, n, dados=None):
+    app = 'analise.py'
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv = _arquivo(dados, f'movimentos_{n}.csv')
+        if csv is None:
+            csv = Path(diretorio) / 'movimentos.csv'
+            gerar_movimentos(n).to_csv(csv, index=False)
+        with medidor.etapa(app, 'contagem em blocos', n):
+            contagem = contar_movimentos(csv)
+
+    with medidor.etapa(app, 'graficos', n):
+        usuarios = tabela_contagem(contagem.usuarios, 'Nome Usuario')
+        formas = tabela_contagem(contagem.formas_pagamento, 'Forma de Pagamento')
+        pix = tabela_contagem(contagem.pix_tef_operador, 'Nome Usuario')
+        for tabela, eixo in [(usuarios, 'Nome Usuario'), (formas, 'Forma de Pagamento'),
+                             (pix, 'Nome Usuario')]:
+            alt.Chart(tabela).mark_bar().encode(
+                x='Quantidade:Q', y=alt.Y(f'{eixo}:N', sort='-x')
+            ).to_json()
+        _serializar(px.pie(formas, names='Forma de Pagamento', values='Quantidade', hole=0.4))
+
+    with medidor.etapa(app, 'movimento por periodo', n):
+        for dimensao in DIMENSOES_TEMPO:
+            for periodo in FREQUENCIAS:
+                movimentos_por_periodo(contagem, dimensao, periodo)
+        movimentos_por_hora_do_dia(contagem)
+
+
+# --------------------------------------------------
+# RESULTADOS
+# --------------------------------------------------
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def salvar(resultados, destino=None):
+    destino = Path(destino) if destino else (
+        DIRETORIO_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_atual(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'resultados': resultados,
+        }, f, ensure_ascii=False, indent=2)
+    return destino
+
+
+def comparar(anterior, resultados):
+    with open(anterior, encoding='utf-8') as f:
+        base = {
+            (r['app'], r['etapa'], r['linhas']): r for r in json.load(f)['resultados']
+        }
+
+    print(f"\nComparação com {anterior}:")
+    regressoes = 0
+    for r in resultados:
+        antes = base.get((r['app'], r['etapa'], r['linhas']))
+        if antes is None or not antes['segundos']:
+            continue
+        variacao = (r['segundos'] / antes['segundos'] - 1) * 100
+        marca = ''
+        if variacao > LIMIAR_REGRESSAO:
+            marca = '  <-- regressão'
+            regressoes += 1
+        print(f"{r['app']:>19} {r['etapa']:<28} {r['linhas']:>11,} "
+              f"{antes['segundos']:9.3f}s -> {r['segundos']:9.3f}s ({variacao:+6.1f}%){marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dos dashboards.')
+    parser.add_argument('--linhas', type=int, nargs='+', default=LINHAS_PADRAO)
+    parser.add_argument('--dados', help='diretório com os arquivos de gerar_dados.py')
+    parser.add_argument('--saida', help='arquivo JSON de resultado')
+    parser.add_argument('--comparar', help='resultado anterior para comparação')
+    parser.add_argument(
+        '--sem-memoria', action='store_true',
+        help='não rastrear memória (tracemalloc deixa as etapas mais lentas)'
+    )
+    args = parser.parse_args(argv)
+
+    medidor = Medidor(medir_memoria=not args.sem_memoria)
+    if medidor.medir_memoria:
+        tracemalloc.start()
+
+    for n in args.linhas:
+        bruto = ler_itens(n, args.dados)
+        data = medir_carga(medidor, bruto, n, args.dados)
+        del bruto
+        data = medir_venda(medidor, data, n)
+        medir_carteira(medidor, data, n, 'vendaCEO.py', matriz=False)
+        medir_carteira(medidor, data, n, 'vendaESTRATEGICA.py', matriz=True)
+        del data
+        medir_analise(medidor, n, args.dados)
+
+    print(f'\nResultados gravados em {salvar(medidor.resultados, args.saida)}')
+    if args.comparar:
+        return 1 if comparar(args.comparar, medidor.resultados) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
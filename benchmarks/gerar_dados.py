@@ -0,0 +1,161 @@
+"""Gera exportações sintéticas no layout real para medir os dashboards.
+
+- Itens gerenciais (venda.py, vendaCEO.py, vendaESTRATEGICA.py): .xlsx e/ou
+  .parquet com as colunas originais (IDPRODUTO, DESCRICAO, DESCRSECAO, ...).
+- Movimento de caixa (analise.py): .csv com as colunas do PDV.
+
+O Excel não passa de 1.048.576 linhas; acima disso só o Parquet é gerado.
+
+Uso: python benchmarks/gerar_dados.py -o dados/ --linhas 10000 1000000 10000000
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+LINHAS_PADRAO = [10_000, 1_000_000, 10_000_000]
+LIMITE_EXCEL = 1_048_575
+
+SECOES = {
+    'MERCEARIA': ['BISCOITOS', 'MASSAS', 'GRAOS', 'ENLATADOS', 'MATINAIS'],
+    'BEBIDAS': ['REFRIGERANTES', 'CERVEJAS', 'SUCOS', 'AGUAS', 'DESTILADOS'],
+    'HORTIFRUTI': ['FRUTAS', 'LEGUMES', 'VERDURAS'],
+    'ACOUGUE': ['BOVINOS', 'SUINOS', 'AVES'],
+    'FRIOS E LATICINIOS': ['QUEIJOS', 'IOGURTES', 'EMBUTIDOS'],
+    'LIMPEZA': ['LAVANDERIA', 'CASA', 'DESCARTAVEIS'],
+    'HIGIENE': ['CABELOS', 'ORAL', 'SABONETES'],
+}
+# Seções vendidas a peso: quantidade fracionada
+SECOES_A_PESO = {'HORTIFRUTI', 'ACOUGUE'}
+
+FORMAS_PAGAMENTO = [
+    'DINHEIRO', 'PIX TEF', 'CARTAO DEBITO', 'CARTAO CREDITO', 'VALE ALIMENTACAO', 'TROCO',
+]
+PESOS_PAGAMENTO = [0.18, 0.25, 0.27, 0.22, 0.05, 0.03]
+
+
+def _catalogo(n_produtos, rng):
+    grupos = [(s, g) for s, gs in SECOES.items() for g in gs]
+    escolha = rng.integers(0, len(grupos), n_produtos)
+    secao = np.array([grupos[i][0] for i in escolha])
+    grupo = np.array([grupos[i][1] for i in escolha])
+    return pd.DataFrame({
+        'IDPRODUTO': np.arange(1, n_produtos + 1),
+        'DESCRICAO': [f'{g} ITEM {i:06d}' for i, g in enumerate(grupo, start=1)],
+        'DESCRSECAO': secao,
+        'DESCRGRUPO': grupo,
+        'IDSECAO': pd.factorize(secao)[0] + 1,
+        'IDSUBGRUPO': pd.factorize(grupo)[0] + 1,
+        'PRECO': np.round(rng.lognormal(2.3, 0.8, n_produtos), 2),
+        # Margem alvo por produto; uma parte vende abaixo do custo
+        'MARKUP': rng.normal(1.30, 0.15, n_produtos),
+        'A_PESO': np.isin(secao, list(SECOES_A_PESO)),
+    })
+
+
+def gerar_itens(n_linhas, semente=0):
+    """Linhas de item no layout da exportação gerencial (antes do tratamento)."""
+    rng = np.random.default_rng(semente)
+    n_produtos = int(min(max(n_linhas // 25, 50), 100_000))
+    catalogo = _catalogo(n_produtos, rng)
+
+    # Popularidade com cauda longa (curva ABC realista)
+    popularidade = rng.pareto(1.1, n_produtos) + 1
+    produto = rng.choice(n_produtos, n_linhas, p=popularidade / popularidade.sum())
+    item = catalogo.iloc[produto].reset_index(drop=True)
+
+    quantidade = np.where(
+        item['A_PESO'],
+        np.round(rng.gamma(2.0, 0.6, n_linhas), 3),
+        rng.integers(1, 7, n_linhas),
+    )
+    valor_unit = np.round(item['PRECO'] * rng.uniform(0.95, 1.05, n_linhas), 2)
+    custo_nf = np.round(item['PRECO'] / item['MARKUP'], 2)
+    custo_ger = np.round(custo_nf * rng.uniform(1.00, 1.08, n_linhas), 2)
+    desconto = np.where(rng.random(n_linhas) < 0.1, rng.uniform(0.9, 1.0, n_linhas), 1.0)
+    valor_total = np.round(valor_unit * quantidade * desconto, 2)
+
+    return pd.DataFrame({
+        'IDPRODUTO': item['IDPRODUTO'],
+        'IDSUBPRODUTO': item['IDPRODUTO'],
+        'REFERENCIA': item['IDPRODUTO'].astype(str).str.zfill(8),
+        'DESCRICAO': pd.Categorical(item['DESCRICAO']),
+        'IDSECAO': item['IDSECAO'],
+        'DESCRSECAO': pd.Categorical(item['DESCRSECAO']),
+        'IDSUBGRUPO': item['IDSUBGRUPO'],
+        'DESCRGRUPO': pd.Categorical(item['DESCRGRUPO']),
+        'QTDPRODUTO': quantidade,
+        'VALUNITBRUTO': valor_unit,
+        'CUSTONOTAFISCAL': custo_nf,
+        'CUSTOGERENCIAL': custo_ger,
+        'VALTOTLIQUIDO': valor_total,
+        'LUCRO': np.round(valor_total - custo_ger * quantidade, 2),
+    })
+
+
+def gerar_movimentos(n_linhas, semente=0, caixas=12, operadores=60, dias=365):
+    """Linhas do CSV de movimento de caixa dos PDVs."""
+    rng = np.random.default_rng(semente)
+    nomes = np.array([f'OPERADOR {i:03d}' for i in range(1, operadores + 1)])
+    operador = rng.integers(0, operadores, n_linhas)
+
+    # Movimento concentrado no horário comercial
+    inicio = np.datetime64('2024-01-01T00:00:00')
+    dia = rng.integers(0, dias, n_linhas).astype('timedelta64[D]')
+    segundo = np.clip(rng.normal(15.5 * 3600, 3 * 3600, n_linhas), 7 * 3600, 22 * 3600)
+    momento = inicio + dia + segundo.astype('int64').astype('timedelta64[s]')
+
+    forma = rng.choice(len(FORMAS_PAGAMENTO), n_linhas, p=PESOS_PAGAMENTO)
+    valor = np.round(rng.lognormal(3.5, 0.9, n_linhas), 2)
+
+    return pd.DataFrame({
+        'idcaixa': rng.integers(1, 4, n_linhas),
+        'idempresa': rng.integers(1, caixas + 1, n_linhas),
+        'idusuario': operador + 1,
+        'nomeusuario': nomes[operador],
+        'tipomovimento': 'V',
+        'idabertura': rng.integers(1, 5000, n_linhas),
+        'idrecebimento': forma + 1,
+        'descrrecebimento': np.array(FORMAS_PAGAMENTO)[forma],
+        'dtmovimento': pd.to_datetime(momento).strftime('%Y-%m-%d %H:%M:%S'),
+        'vallancamento': valor,
+        'valreforcocx': 0.0,
+        'tiporeforco': '',
+    })
+
+
+def gravar(saida, linhas, formatos):
+    saida = Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    arquivos = []
+    for n in linhas:
+        itens = gerar_itens(n)
+        if 'parquet' in formatos:
+            arquivos.append(saida / f'itens_{n}.parquet')
+            itens.to_parquet(arquivos[-1], index=False)
+        if 'xlsx' in formatos and n <= LIMITE_EXCEL:
+            arquivos.append(saida / f'itens_{n}.xlsx')
+            itens.to_excel(arquivos[-1], index=False)
+        del itens
+
+        arquivos.append(saida / f'movimentos_{n}.csv')
+        gerar_movimentos(n).to_csv(arquivos[-1], index=False)
+    return arquivos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera exportações sintéticas.')
+    parser.add_argument('-o', '--saida', default='dados')
+    parser.add_argument('--linhas', type=int, nargs='+', default=LINHAS_PADRAO)
+    parser.add_argument(
+        '--formatos', nargs='+', choices=['xlsx', 'parquet'], default=['xlsx', 'parquet']
+    )
+    args = parser.parse_args(argv)
+
+    for arquivo in gravar(args.saida, args.linhas, args.formatos):
+        print(arquivo)
+
+
+if __name__ == '__main__':
+    main()
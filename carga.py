@@ -0,0 +1,236 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from esquema import aplicar_esquema
+
+# --------------------------------------------------
+# LAYOUT DA EXPORTAÇÃO GERENCIAL
+# --------------------------------------------------
+COLUNAS_DESCARTADAS = ['IDSUBPRODUTO', 'REFERENCIA', 'IDSECAO', 'IDSUBGRUPO']
+
+MAPA_COLUNAS = {
+    'QTDPRODUTO': 'Quantidade',
+    'LUCRO': 'Lucro',
+    'CUSTOGERENCIAL': 'Custo Gerencial',
+    'CUSTONOTAFISCAL': 'Custo Nota Fiscal',
+    'VALTOTLIQUIDO': 'Valor Total Liquido',
+    'VALUNITBRUTO': 'Valor Unitário Bruto',
+    'DESCRSECAO': 'Seção',
+    'IDPRODUTO': 'Código Produto',
+    'DESCRGRUPO': 'Grupo',
+}
+
+# Só estas colunas são lidas da planilha; o resto nem chega a ser convertido
+COLUNAS_USADAS = ['DESCRICAO', *MAPA_COLUNAS]
+
+# Mudou o tratamento da planilha? Incremente para invalidar o cache em disco
+VERSAO_CACHE = 5
+
+DIRETORIO_CACHE = Path(
+    os.environ.get('VENDAS_CACHE_DIR', Path.home() / '.cache' / 'vendas')
+)
+LIMITE_CACHE_MB = int(os.environ.get('VENDAS_CACHE_MAX_MB', '2048'))
+
+
+def _motor_excel():
+    # python-calamine (Rust) lê .xlsx bem mais rápido que o openpyxl;
+    # o pandas só reconhece esse motor a partir da 2.2
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    versao = tuple(int(p) for p in pd.__version__.split('.')[:2])
+    return 'calamine' if versao >= (2, 2) else None
+
+
+MOTOR_EXCEL = os.environ.get('VENDAS_MOTOR_EXCEL') or _motor_excel()
+
+
+def ler_excel(conteudo, motor=MOTOR_EXCEL):
+    """Lê só as COLUNAS_USADAS, com o motor rápido quando disponível."""
+    opcoes = {'usecols': lambda coluna: coluna in COLUNAS_USADAS}
+    if motor:
+        try:
+            return pd.read_excel(io.BytesIO(conteudo), engine=motor, **opcoes)
+        except ImportError:
+            # motor configurado mas não instalado: segue com o padrão
+            pass
+    return pd.read_excel(io.BytesIO(conteudo), **opcoes)
+
+
+def tratar_planilha(data):
+    # se não encontrar a coluna, não lançar erro
+    data = data.drop(columns=COLUNAS_DESCARTADAS, errors='ignore')
+    data = data.rename(columns=MAPA_COLUNAS)
+    return aplicar_esquema(data)
+
+
+# --------------------------------------------------
+# CACHE COLUNAR (PARQUET) COM DESCARTE LRU
+# --------------------------------------------------
+class CacheColunar:
+    """Guarda as planilhas já tratadas em Parquet, indexadas pelo hash do upload.
+
+    O mtime de cada arquivo marca o último acesso; quando o diretório passa
+    do limite, os arquivos usados há mais tempo são apagados primeiro.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_CACHE, limite_mb=LIMITE_CACHE_MB):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_mb * 1024 * 1024
+
+    def caminho(self, chave):
+        return self.diretorio / f'{chave}.parquet'
+
+    def ler(self, chave):
+        caminho = self.caminho(chave)
+        try:
+            data = pd.read_parquet(caminho)
+        except (FileNotFoundError, ImportError):
+            return None
+        os.utime(caminho)
+        return data
+
+    def gravar(self, chave, data):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho = self.caminho(chave)
+        temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            data.to_parquet(temporario, index=False)
+        except ImportError:
+            # Sem pyarrow/fastparquet o app segue funcionando, só sem cache
+            return
+        os.replace(temporario, caminho)
+        self.descartar_excedente()
+
+    def descartar_excedente(self):
+        arquivos = sorted(
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in self.diretorio.iterdir()
+            if p.suffix in ('.parquet', '.duckdb')
+        )
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in arquivos:
+            if total <= self.limite_bytes:
+                break
+            caminho.unlink(missing_ok=True)
+            total -= tamanho
+
+
+def caminho_duckdb(data, diretorio=DIRETORIO_CACHE):
+    """Arquivo .duckdb do dataset, ao lado do Parquet no mesmo cache."""
+    return Path(diretorio) / f"{data.attrs['chave']}.duckdb"
+
+
+def chave_upload(conteudo):
+    return hashlib.sha256(conteudo).hexdigest() + f'-v{VERSAO_CACHE}'
+
+
+def carregar_planilha(conteudo, cache=None):
+    """Lê a exportação gerencial (.xlsx) a partir dos bytes do upload.
+
+    Na primeira vez a planilha é convertida para Parquet; depois todos os
+    dashboards leem direto desse arquivo. Sem cache informado usa o dos
+    dashboards; cache=False lê sempre a planilha.
+    """
+    if cache is None:
+        cache = CacheColunar()
+    chave = chave_upload(conteudo)
+
+    data = cache.ler(chave) if cache else None
+    if data is None:
+        data = tratar_planilha(ler_excel(conteudo))
+        if cache:
+            cache.gravar(chave, data)
+
+    # Identifica o dataset para os caches e índices montados sobre ele
+    data.attrs['chave'] = chave
+    return data
+
+
+# --------------------------------------------------
+# DATASET COMPARTILHADO (SOMENTE LEITURA)
+# --------------------------------------------------
+_METODOS_INPLACE = [
+    'drop', 'rename', 'fillna', 'replace', 'sort_values', 'sort_index',
+    'reset_index', 'set_index', 'dropna', 'drop_duplicates', 'clip',
+    'where', 'mask', 'query', 'eval', 'interpolate', 'update',
+]
+
+
+def _erro_mutacao(*args, **kwargs):
+    raise TypeError(
+        'O dataset carregado é compartilhado entre sessões e não pode ser '
+        'alterado; calcule colunas novas em derivadas.py ou trabalhe sobre '
+        'um recorte (df[...]).'
+    )
+
+
+def _bloquear_inplace(nome):
+    original = getattr(pd.DataFrame, nome)
+
+    def metodo(self, *args, **kwargs):
+        if kwargs.get('inplace'):
+            _erro_mutacao()
+        return original(self, *args, **kwargs)
+
+    metodo.__name__ = nome
+    return metodo
+
+
+class _IndexadorSomenteLeitura:
+    # loc/iloc/at/iat: leitura delegada ao indexador do pandas, escrita bloqueada
+
+    def __init__(self, indexador):
+        self._indexador = indexador
+
+    def __getitem__(self, chave):
+        return self._indexador[chave]
+
+    __setitem__ = _erro_mutacao
+
+    def __call__(self, *args, **kwargs):
+        return _IndexadorSomenteLeitura(self._indexador(*args, **kwargs))
+
+    def __getattr__(self, nome):
+        return getattr(self._indexador, nome)
+
+
+def _bloquear_indexador(nome):
+    original = getattr(pd.DataFrame, nome)
+    return property(lambda self: _IndexadorSomenteLeitura(original.fget(self)))
+
+
+class DadosSomenteLeitura(pd.DataFrame):
+    """DataFrame servido pelo st.cache_resource sem cópia a cada rerun.
+
+    Atribuição/remoção de colunas, escrita por loc/iloc/at/iat e métodos com
+    inplace=True levantam TypeError. Qualquer recorte ou agregação devolve um
+    DataFrame comum.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    __setitem__ = _erro_mutacao
+    __delitem__ = _erro_mutacao
+    insert = _erro_mutacao
+    pop = _erro_mutacao
+
+
+for _nome in _METODOS_INPLACE:
+    setattr(DadosSomenteLeitura, _nome, _bloquear_inplace(_nome))
+
+for _nome in ['loc', 'iloc', 'at', 'iat']:
+    setattr(DadosSomenteLeitura, _nome, _bloquear_indexador(_nome))
+
+
+def somente_leitura(data):
+    compartilhado = DadosSomenteLeitura(data)
+    compartilhado.attrs = dict(data.attrs)
+    return compartilhado
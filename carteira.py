@@ -0,0 +1,51 @@
+import streamlit as st
+
+from agregacao import criar_agregador
+from carga import caminho_duckdb, carregar_planilha, somente_leitura
+from consolidado import ler_consolidado
+from derivadas import adicionar_colunas_derivadas
+from esquema import resumo_memoria
+
+# --------------------------------------------------
+# ENTRADA DOS DASHBOARDS DE CARTEIRA
+# --------------------------------------------------
+# vendaCEO.py e vendaESTRATEGICA.py aceitam a planilha de itens ou o
+# consolidado do relatorio_lote.py; os dois caminhos terminam em (totais, cubo).
+# O venda.py usa só carregar_dados.
+
+
+# cache_resource: uma única instância por planilha, sem cópia a cada rerun.
+# As colunas derivadas já saem prontas e o frame não aceita alterações.
+@st.cache_resource(max_entries=3)
+def carregar_dados(uploaded_file):
+    data = adicionar_colunas_derivadas(carregar_planilha(uploaded_file.getvalue()))
+    return somente_leitura(data)
+
+
+@st.cache_resource(max_entries=3)
+def carregar_consolidado(uploaded_file):
+    # Consolidado do relatorio_lote.py: totais e cubo, sem linhas de item
+    return ler_consolidado(uploaded_file.getvalue())
+
+
+def carregar_carteira(uploaded_file, perfil):
+    """Totais e cubo do upload; abre as seções Carga e Visão Executiva do perfil."""
+    perfil.secao("Carga")
+    if uploaded_file.name.lower().endswith(".parquet"):
+        try:
+            totais, cubo = carregar_consolidado(uploaded_file)
+        except ValueError as e:
+            st.error(f"Erro ao abrir o consolidado: {e}")
+            st.stop()
+        perfil.secao("Visão Executiva", len(cubo))
+        return totais, cubo
+
+    df = carregar_dados(uploaded_file)
+    if resumo_memoria(df):
+        st.sidebar.caption(resumo_memoria(df))
+
+    perfil.secao("Visão Executiva", len(df))
+    # Totais e cubo vêm do backend configurado (pandas ou DuckDB);
+    # um único groupby alimenta todas as seções do dashboard
+    agregador = criar_agregador(df, caminho_duckdb(df))
+    return agregador.totais(), agregador.cubo()
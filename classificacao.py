@@ -0,0 +1,49 @@
+import numpy as np
+
+# --------------------------------------------------
+# CURVA ABC
+# --------------------------------------------------
+LIMITE_A = 80
+LIMITE_B = 95
+
+
+def classificar_abc(percentual_acumulado, limite_a=LIMITE_A, limite_b=LIMITE_B):
+    """Classe ABC de cada produto a partir do % acumulado, sem apply."""
+    p = np.asarray(percentual_acumulado)
+    return np.select([p <= limite_a, p <= limite_b], ['A', 'B'], default='C')
+
+
+def curva_abc(ranking, coluna='Valor Total Liquido', total=None,
+              limite_a=LIMITE_A, limite_b=LIMITE_B):
+    """Adiciona '% Acumulado' e 'Classe ABC' a um ranking já ordenado."""
+    total = ranking[coluna].sum() if total is None else total
+    ranking['% Acumulado'] = ranking[coluna].cumsum() / total * 100
+    ranking['Classe ABC'] = classificar_abc(ranking['% Acumulado'], limite_a, limite_b)
+    return ranking
+
+
+# --------------------------------------------------
+# MATRIZ ESTRATÉGICA
+# --------------------------------------------------
+ESTRELA = "⭐ Estrela"
+CAIXA = "🐄 Caixa"
+OPORTUNIDADE = "🚀 Oportunidade"
+PROBLEMA = "⚠ Problema"
+
+
+def classificar_matriz(venda, margem, venda_corte=None, margem_corte=None):
+    """Quadrante de cada produto; por padrão o corte é a mediana de cada eixo."""
+    venda = np.asarray(venda)
+    margem = np.asarray(margem)
+    venda_corte = np.nanmedian(venda) if venda_corte is None else venda_corte
+    margem_corte = np.nanmedian(margem) if margem_corte is None else margem_corte
+
+    # Comparações explícitas nos dois sentidos: valores NaN caem em Problema
+    venda_alta, venda_baixa = venda >= venda_corte, venda < venda_corte
+    margem_alta, margem_baixa = margem >= margem_corte, margem < margem_corte
+
+    return np.select(
+        [venda_alta & margem_alta, venda_alta & margem_baixa, venda_baixa & margem_alta],
+        [ESTRELA, CAIXA, OPORTUNIDADE],
+        default=PROBLEMA,
+    )
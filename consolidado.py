@@ -0,0 +1,51 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from agregacao import COLUNAS_TOTAIS
+from esquema import soma
+
+# --------------------------------------------------
+# CONSOLIDADO DA CARTEIRA
+# --------------------------------------------------
+# O cubo de produtos (uma linha por DESCRICAO/Seção/Grupo) gravado em Parquet.
+# É tudo o que vendaCEO.py e vendaESTRATEGICA.py precisam: abrir o consolidado
+# dispensa a planilha de itens. A Classe ABC e a Categoria Estratégica não são
+# gravadas; os dashboards as calculam do cubo, como fazem com a planilha.
+# Gerado pelo relatorio_lote.py (consolidado.parquet).
+VERSAO_CONSOLIDADO = 2
+
+# A versão vai nos metadados do esquema Arrow do Parquet: df.attrs só
+# sobrevive à ida e volta a partir do pandas 2.1.
+CHAVE_VERSAO = b'vendas.consolidado'
+
+
+def gravar_consolidado(consolidado, destino):
+    tabela = pa.Table.from_pandas(consolidado, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        CHAVE_VERSAO: str(VERSAO_CONSOLIDADO).encode(),
+    })
+    pq.write_table(tabela, destino)
+    return destino
+
+
+def ler_consolidado(conteudo):
+    """Devolve (totais, cubo) de um consolidado em bytes.
+
+    Levanta ValueError se o arquivo não for um consolidado desta versão.
+    """
+    tabela = pq.read_table(io.BytesIO(conteudo))
+    versao = (tabela.schema.metadata or {}).get(CHAVE_VERSAO, b'').decode() or None
+    if versao != str(VERSAO_CONSOLIDADO):
+        raise ValueError(
+            f"arquivo não é um consolidado da carteira (versão {versao}, "
+            f"esperada {VERSAO_CONSOLIDADO}); gere de novo com relatorio_lote.py"
+        )
+
+    cubo = tabela.to_pandas()
+    cubo.attrs = {}
+    totais = {c: soma(cubo[c]) for c in COLUNAS_TOTAIS}
+    return totais, cubo
+
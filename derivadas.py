@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# COLUNAS DERIVADAS POR ITEM
+# --------------------------------------------------
+STATUS = ['Saudável', 'Prejuízo']
+
+
+def _numexpr():
+    # numexpr avalia cada expressão em blocos que cabem no cache, em várias
+    # threads e sem temporários intermediários; sem ele, numpy com out=
+    try:
+        import numexpr
+    except ImportError:
+        return None
+    return numexpr
+
+
+NUMEXPR = _numexpr()
+
+
+def calcular_metricas(preco, custo, quantidade, motor=NUMEXPR):
+    """Margem unitária, prejuízo total, markup e flag de prejuízo por item.
+
+    Recebe arrays numpy e devolve um dicionário de arrays no dtype do preço
+    (float64 depois do esquema). Custo zero deixa o markup em NaN em vez de inf.
+    """
+    tipo = np.result_type(preco, custo)
+    margem = np.empty(len(preco), dtype=tipo)
+    prejuizo = np.empty(len(preco), dtype=tipo)
+    markup = np.empty(len(preco), dtype=tipo)
+
+    if motor is not None:
+        nan = tipo.type(np.nan)
+        motor.evaluate('preco - custo', out=margem, casting='unsafe')
+        motor.evaluate('margem * quantidade', out=prejuizo, casting='unsafe')
+        motor.evaluate(
+            'where(custo != 0, preco / custo, nan)', out=markup, casting='unsafe'
+        )
+    else:
+        np.subtract(preco, custo, out=margem)
+        np.multiply(margem, quantidade, out=prejuizo, casting='unsafe')
+        markup.fill(np.nan)
+        np.divide(preco, custo, out=markup, where=custo != 0)
+
+    return {
+        'Margem Unitária': margem,
+        'Prejuízo Total': prejuizo,
+        'Markup': markup,
+        'Prejuízo': margem < 0,
+    }
+
+
+def adicionar_colunas_derivadas(df, motor=NUMEXPR):
+    """Margem Unitária, Prejuízo Total, Markup e Status no próprio frame.
+
+    As colunas são acrescentadas sem copiar o restante dos dados; os três
+    dashboards usam esta função e leem delas em vez de criar cópias próprias.
+    """
+    metricas = calcular_metricas(
+        df['Valor Unitário Bruto'].to_numpy(),
+        df['Custo Gerencial'].to_numpy(),
+        df['Quantidade'].to_numpy(),
+        motor,
+    )
+
+    df['Margem Unitária'] = metricas['Margem Unitária']
+    df['Prejuízo Total'] = metricas['Prejuízo Total']
+    df['Markup'] = metricas['Markup']
+    df['Status'] = pd.Categorical.from_codes(
+        metricas['Prejuízo'].view(np.int8), categories=STATUS
+    )
+    return df
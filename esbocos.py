@@ -0,0 +1,269 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# ESBOÇOS (SKETCHES) PARA DADOS EM BLOCOS OU EM VÁRIAS LOJAS
+# --------------------------------------------------
+# Estruturas de tamanho fixo que recebem os dados aos poucos e podem ser
+# somadas entre blocos, arquivos e processos. Trocam exatidão por memória:
+# os erros esperados estão documentados em cada classe.
+
+
+# --------------------------------------------------
+# HYPERLOGLOG: VALORES DISTINTOS
+# --------------------------------------------------
+# 2^14 registradores (16 KB). Erro padrão relativo de 1,04 / sqrt(2^p):
+# 0,8% com p=14; em ~95% dos casos a estimativa fica a menos de 1,6%.
+PRECISAO_HLL = 14
+
+
+def _hashes(valores):
+    # Hash de 64 bits estável entre processos (chave fixa do pandas)
+    serie = pd.Series(valores)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories.astype(str).to_numpy(dtype=object)
+        codigos = serie.cat.codes.to_numpy()
+        return pd.util.hash_array(categorias)[codigos[codigos >= 0]]
+    return pd.util.hash_array(serie.dropna().astype(str).to_numpy(dtype=object))
+
+
+class ContagemDistinta:
+    """HyperLogLog: estimativa do número de valores distintos."""
+
+    def __init__(self, precisao=PRECISAO_HLL):
+        self.precisao = precisao
+        self.registradores = np.zeros(2 ** precisao, dtype=np.uint8)
+
+    def atualizar(self, valores):
+        h = _hashes(valores)
+        if not len(h):
+            return self
+        bits_restantes = 64 - self.precisao
+        posicao = (h >> np.uint64(bits_restantes)).astype(np.intp)
+        resto = h & np.uint64((1 << bits_restantes) - 1)
+        # frexp devolve o número de bits de resto (exato: resto < 2^53)
+        _, bits = np.frexp(resto.astype(np.float64))
+        rank = (bits_restantes - bits + 1).astype(np.uint8)
+        np.maximum.at(self.registradores, posicao, rank)
+        return self
+
+    def somar(self, outra):
+        if outra.precisao != self.precisao:
+            raise ValueError('HyperLogLog com precisões diferentes não podem ser somados')
+        np.maximum(self.registradores, outra.registradores, out=self.registradores)
+        return self
+
+    def estimativa(self):
+        m = len(self.registradores)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        bruta = alfa * m * m / np.sum(np.ldexp(1.0, -self.registradores.astype(np.int64)))
+        vazios = int((self.registradores == 0).sum())
+        # Poucos valores: contagem linear dos registradores vazios é mais precisa
+        if bruta <= 2.5 * m and vazios:
+            return m * math.log(m / vazios)
+        return float(bruta)
+
+
+# --------------------------------------------------
+# KLL: QUANTIS (MEDIANA, PERCENTIS)
+# --------------------------------------------------
+# Compactadores em níveis: cada nível guarda amostras com peso 2^nível e,
+# cheio, ordena e promove metade delas ao nível seguinte. Com k=200 o erro
+# de posição fica em torno de 1,7% (a mediana estimada está entre os
+# percentis ~48 e ~52), com memória de poucos milhares de valores.
+K_QUANTIS = 200
+
+
+class EsbocoQuantis:
+    """KLL: quantis aproximados de uma coluna numérica."""
+
+    def __init__(self, k=K_QUANTIS, semente=None):
+        self.k = k
+        self.n = 0
+        self.niveis = [np.empty(0)]
+        self._rng = np.random.default_rng(semente)
+
+    def _capacidade(self, nivel):
+        profundidade = len(self.niveis) - nivel - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** profundidade))
+
+    def _compactar(self):
+        while True:
+            cheio = next(
+                (h for h, itens in enumerate(self.niveis) if len(itens) > self._capacidade(h)),
+                None,
+            )
+            if cheio is None:
+                return
+            if cheio + 1 == len(self.niveis):
+                self.niveis.append(np.empty(0))
+
+            itens = np.sort(self.niveis[cheio])
+            # Com quantidade ímpar, o último fica no nível para a próxima vez
+            par = len(itens) - len(itens) % 2
+            promovidos = itens[self._rng.integers(2):par:2]
+            self.niveis[cheio] = itens[par:]
+            self.niveis[cheio + 1] = np.concatenate([self.niveis[cheio + 1], promovidos])
+
+    def atualizar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        self.n += len(valores)
+        self.niveis[0] = np.concatenate([self.niveis[0], valores])
+        self._compactar()
+        return self
+
+    def somar(self, outro):
+        while len(self.niveis) < len(outro.niveis):
+            self.niveis.append(np.empty(0))
+        for h, itens in enumerate(outro.niveis):
+            self.niveis[h] = np.concatenate([self.niveis[h], itens])
+        self.n += outro.n
+        self._compactar()
+        return self
+
+    def quantis(self, qs):
+        """Valores nas frações qs (0 a 1); NaN se o esboço estiver vazio."""
+        valores = np.concatenate(self.niveis)
+        if not len(valores):
+            return np.full(len(qs), np.nan)
+        pesos = np.concatenate([
+            np.full(len(itens), 2 ** h, dtype=np.float64) for h, itens in enumerate(self.niveis)
+        ])
+        ordem = np.argsort(valores, kind='stable')
+        acumulado = np.cumsum(pesos[ordem])
+        posicoes = np.searchsorted(acumulado, np.asarray(qs) * acumulado[-1], side='left')
+        return valores[ordem][np.minimum(posicoes, len(valores) - 1)]
+
+    def mediana(self):
+        return float(self.quantis([0.5])[0])
+
+
+# --------------------------------------------------
+# SPACE-SAVING: VALORES MAIS FREQUENTES (TOP-K)
+# --------------------------------------------------
+# Mantém no máximo `capacidade` contadores. Um valor novo com a tabela cheia
+# toma o lugar do menor contador e herda a contagem dele como erro. Todo
+# valor com frequência acima de total/capacidade está entre os monitorados,
+# e cada contagem superestima a real em no máximo o erro registrado. Enquanto
+# nenhum contador é descartado (menos valores distintos que a capacidade), a
+# contagem é exata; a capacidade mínima cobre os cadastros usuais de
+# operadores e formas de pagamento.
+FATOR_CAPACIDADE = 10
+CAPACIDADE_MINIMA = 1_000
+
+
+class TopK:
+    """Space-saving: candidatos aos k valores mais frequentes em memória fixa."""
+
+    def __init__(self, k, capacidade=None):
+        self.k = k
+        self.capacidade = capacidade or max(k * FATOR_CAPACIDADE, CAPACIDADE_MINIMA)
+        self.total = 0
+        self.descartes = 0
+        self.contadores = {}
+
+    def _incrementar(self, valor, contagem, erro=0):
+        if valor in self.contadores:
+            atual = self.contadores[valor]
+            self.contadores[valor] = (atual[0] + contagem, atual[1] + erro)
+            return
+        if len(self.contadores) >= self.capacidade:
+            menor = min(self.contadores, key=lambda v: self.contadores[v][0])
+            piso = self.contadores.pop(menor)[0]
+            self.descartes += 1
+            contagem, erro = contagem + piso, erro + piso
+        self.contadores[valor] = (contagem, erro)
+
+    def atualizar(self, valores):
+        """Conta um bloco de valores (um value_counts por bloco, não por linha)."""
+        contagens = pd.Series(valores).value_counts()
+        for valor, contagem in contagens[contagens > 0].items():
+            self._incrementar(str(valor), int(contagem))
+        self.total += int(contagens.sum())
+        return self
+
+    def somar(self, outro):
+        for valor, (contagem, erro) in outro.contadores.items():
+            self._incrementar(valor, contagem, erro)
+        self.total += outro.total
+        self.descartes += outro.descartes
+        return self
+
+    @property
+    def exato(self):
+        """Sem descartes, os candidatos são todos os valores vistos."""
+        return self.descartes == 0
+
+    def candidatos(self):
+        """Todos os valores monitorados: a recontagem exata escolhe os k finais."""
+        return list(self.contadores)
+
+    def estimativa(self):
+        """Os k maiores contadores (limite superior da contagem real)."""
+        serie = pd.Series(
+            {v: c for v, (c, _) in self.contadores.items()}, dtype='int64'
+        )
+        return serie.nlargest(self.k)
+
+
+# --------------------------------------------------
+# INDICADORES DE CARTEIRA APROXIMADOS
+# --------------------------------------------------
+# Risco da Carteira e os cortes da Matriz Estratégica somados entre lojas
+# sem juntar as tabelas: cada loja atualiza um esboço com a sua tabela por
+# produto e os esboços são somados. Produtos distintos contam uma vez na
+# rede; as medianas são sobre os pares (loja, produto). Com semente fixa,
+# as mesmas lojas somadas na mesma ordem dão os mesmos percentis.
+SEMENTE_CARTEIRA = 0
+
+
+class EsbocoCarteira:
+
+    def __init__(self, semente=SEMENTE_CARTEIRA):
+        self.lojas = 0
+        self.produtos = ContagemDistinta()
+        self.produtos_prejuizo = ContagemDistinta()
+        self.venda = EsbocoQuantis(semente=semente)
+        self.margem = EsbocoQuantis(semente=semente)
+
+    def atualizar(self, produtos):
+        """Incorpora uma tabela por produto (saída de por_produto)."""
+        self.lojas += 1
+        self.produtos.atualizar(produtos['DESCRICAO'])
+        self.produtos_prejuizo.atualizar(
+            produtos.loc[produtos['Linhas com Prejuízo'] > 0, 'DESCRICAO']
+        )
+        # Mesmo recorte da matriz estratégica: produtos com venda
+        com_venda = produtos[produtos['Valor Total Liquido'] != 0]
+        self.venda.atualizar(com_venda['Valor Total Liquido'])
+        self.margem.atualizar(com_venda['Lucro'] / com_venda['Valor Total Liquido'] * 100)
+        return self
+
+    def somar(self, outro):
+        self.lojas += outro.lojas
+        self.produtos.somar(outro.produtos)
+        self.produtos_prejuizo.somar(outro.produtos_prejuizo)
+        self.venda.somar(outro.venda)
+        self.margem.somar(outro.margem)
+        return self
+
+    def indicadores(self):
+        produtos = self.produtos.estimativa()
+        prejuizo = min(self.produtos_prejuizo.estimativa(), produtos)
+        venda = self.venda.quantis([0.25, 0.5, 0.75])
+        margem = self.margem.quantis([0.25, 0.5, 0.75])
+        return {
+            'lojas': self.lojas,
+            'produtos_distintos': round(produtos),
+            'produtos_prejuizo': round(prejuizo),
+            'risco_carteira': (prejuizo / produtos) * 100 if produtos > 0 else 0,
+            'venda_produto_p25': float(venda[0]),
+            'venda_produto_mediana': float(venda[1]),
+            'venda_produto_p75': float(venda[2]),
+            'margem_produto_p25': float(margem[0]),
+            'margem_produto_mediana': float(margem[1]),
+            'margem_produto_p75': float(margem[2]),
+        }
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# ESQUEMA DE TIPOS APLICADO NA CARGA
+# --------------------------------------------------
+# Textos repetidos viram categóricos (códigos inteiros + dicionário) e
+# quantidades/ids o menor inteiro que couber. Valores monetários e quantidades
+# fracionadas ficam em float64: em float32 cada linha já seria arredondada
+# antes da soma (1M de linhas de R$ 1.234,56 somam R$ 58,59 a mais, e 2,3 kg
+# vira 2,29999995).
+CATEGORICAS = [
+    'DESCRICAO', 'Seção', 'Grupo',
+    'Nome Usuario', 'Forma de Pagamento', 'Caixa',
+]
+
+MONETARIAS = [
+    'Valor Total Liquido', 'Lucro', 'Custo Gerencial',
+    'Custo Nota Fiscal', 'Valor Unitário Bruto',
+]
+
+INTEIRAS = ['Quantidade', 'Código Produto']
+
+
+def memoria_mb(df):
+    return float(df.memory_usage(deep=True).sum()) / 1024 ** 2
+
+
+def _reduzir_inteiro(serie):
+    numerica = pd.to_numeric(serie, errors='coerce')
+    # Quantidade fracionada (produto pesado) não pode virar inteiro
+    if numerica.isna().any() or not np.array_equal(numerica, np.round(numerica)):
+        return numerica.astype('float64')
+    return pd.to_numeric(numerica, downcast='integer')
+
+
+def aplicar_esquema(df):
+    """Converte as colunas conhecidas e registra a memória em df.attrs."""
+    antes = memoria_mb(df)
+
+    convertidas = {}
+    for coluna in df.columns:
+        if coluna in CATEGORICAS:
+            convertidas[coluna] = df[coluna].astype('category')
+        elif coluna in MONETARIAS:
+            convertidas[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+        elif coluna in INTEIRAS:
+            convertidas[coluna] = _reduzir_inteiro(df[coluna])
+
+    df = df.assign(**convertidas)
+    df.attrs['memoria_antes_mb'] = antes
+    df.attrs['memoria_depois_mb'] = memoria_mb(df)
+    return df
+
+
+def resumo_memoria(df):
+    antes = df.attrs.get('memoria_antes_mb')
+    depois = df.attrs.get('memoria_depois_mb')
+    if antes is None or depois is None:
+        return None
+    return f"Memória: {antes:,.1f} MB → {depois:,.1f} MB"
+
+
+def soma(serie):
+    """Soma em float64, qualquer que seja o tipo da coluna."""
+    return float(np.nansum(serie.to_numpy(dtype='float64', na_value=np.nan)))
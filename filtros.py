@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# ÍNDICE INVERTIDO DOS FILTROS DA SIDEBAR
+# --------------------------------------------------
+# Cada coluna filtrável é indexada uma vez por dataset: as linhas ficam
+# ordenadas pelo código do valor, e cada valor aponta para a sua fatia de
+# posições. Uma combinação de filtros vira a interseção dessas listas de
+# posições seguida de um único take, então o custo cresce com o número de
+# linhas selecionadas e não com o tamanho da planilha.
+
+
+class _IndiceColuna:
+
+    def __init__(self, serie):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            self.valores = serie.cat.categories
+        else:
+            codigos, self.valores = pd.factorize(serie)
+
+        self.ordem = np.argsort(codigos, kind='stable')
+        contagens = np.bincount(codigos[codigos >= 0], minlength=len(self.valores))
+        # As linhas sem valor (código -1) ficam no início da ordenação
+        self.inicios = np.concatenate([[0], np.cumsum(contagens)]) + (codigos < 0).sum()
+
+    def posicoes(self, selecionados):
+        codigos = self.valores.get_indexer(pd.Index(selecionados))
+        fatias = [
+            self.ordem[self.inicios[c]:self.inicios[c + 1]]
+            for c in np.unique(codigos[codigos >= 0])
+        ]
+        if not fatias:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(fatias))
+
+
+class IndiceFiltros:
+
+    def __init__(self, df, colunas):
+        self.colunas = list(colunas)
+        self._indices = {c: _IndiceColuna(df[c]) for c in self.colunas}
+
+    def posicoes(self, selecao):
+        """Posições das linhas que atendem a todos os filtros preenchidos.
+
+        Devolve None quando nenhum filtro está ativo.
+        """
+        resultado = None
+        for coluna, selecionados in selecao.items():
+            if not selecionados:
+                continue
+            posicoes = self._indices[coluna].posicoes(selecionados)
+            resultado = (
+                posicoes if resultado is None
+                else np.intersect1d(resultado, posicoes, assume_unique=True)
+            )
+        return resultado
+
+    def filtrar(self, df, selecao):
+        posicoes = self.posicoes(selecao)
+        if posicoes is None:
+            return df
+        return df.take(posicoes)
+
+
+# --------------------------------------------------
+# BUSCA NA LISTA DE DESCRIÇÕES
+# --------------------------------------------------
+# Com dezenas de milhares de produtos, enviar todas as descrições para o
+# multiselect deixa a sidebar lenta. O índice guarda os valores distintos
+# normalizados (sem acento, sem caixa) e ordenados: prefixo sai por busca
+# binária e trecho por varredura de um único texto concatenado. Só as N
+# primeiras ocorrências chegam ao navegador.
+LIMITE_SUGESTOES = 50
+
+
+def _normalizar(serie):
+    return (
+        serie.astype(str)
+        .str.replace('\n', ' ')
+        .str.normalize('NFKD')
+        .str.encode('ascii', 'ignore')
+        .str.decode('ascii')
+        .str.casefold()
+        .str.strip()
+    )
+
+
+class BuscaTextual:
+
+    def __init__(self, serie):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valores = serie.cat.categories
+        else:
+            valores = pd.Index(serie.dropna().unique())
+
+        chaves = _normalizar(pd.Series(valores, dtype=object)).to_numpy(dtype=object)
+        ordem = np.argsort(chaves, kind='stable')
+        self.valores = valores[ordem]
+        self._chaves = chaves[ordem]
+        self._texto = '\n'.join(self._chaves) + '\n'
+        tamanhos = np.fromiter((len(c) + 1 for c in self._chaves), np.int64, len(self._chaves))
+        self._inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+
+    def buscar(self, termo, n=LIMITE_SUGESTOES):
+        """Até n valores: primeiro os que começam com o termo, depois os que o contêm."""
+        chave = _normalizar(pd.Series([termo or ''])).iloc[0]
+        if not chave:
+            return []
+
+        inicio = np.searchsorted(self._chaves, chave, side='left')
+        fim = np.searchsorted(self._chaves, chave + '\uffff', side='left')
+        encontrados = list(range(inicio, min(fim, inicio + n)))
+
+        # Se faltar, o trecho em qualquer ponto (prefixos já estão todos na lista)
+        posicao = 0
+        while len(encontrados) < n:
+            posicao = self._texto.find(chave, posicao)
+            if posicao < 0:
+                break
+            i = np.searchsorted(self._inicios, posicao, side='right') - 1
+            if not inicio <= i < fim:
+                encontrados.append(i)
+            posicao = self._inicios[i] + len(self._chaves[i]) + 1
+        return self.valores[encontrados].tolist()
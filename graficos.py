@@ -0,0 +1,188 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from agregacao import CacheAgregados
+
+# --------------------------------------------------
+# DISPERSÃO CUSTO GERENCIAL X VALOR UNITÁRIO
+# --------------------------------------------------
+# Acima de LIMITE_PONTOS itens o navegador não recebe mais todas as linhas:
+# ou uma amostra estratificada por Grupo que mantém todos os itens com
+# prejuízo, ou uma grade de densidade calculada no servidor.
+#
+# O plotly é importado dentro das funções que montam figuras: importar este
+# módulo não o carrega, e com o cache de figuras quente ele nem é usado.
+LIMITE_PONTOS = 50_000
+LIMITE_WEBGL = 5_000
+CELULAS_GRADE = 200
+
+MODO_PONTOS = "Todos os pontos"
+MODO_AMOSTRA = "Amostra estratificada"
+MODO_DENSIDADE = "Mapa de densidade"
+
+EIXO_X = "Valor Unitário Bruto"
+EIXO_Y = "Custo Gerencial"
+
+
+def em_prejuizo(df):
+    return df[EIXO_Y] > df[EIXO_X]
+
+
+def _amostrar(df, limite, estrato, semente):
+    if len(df) <= limite:
+        return df
+    return (
+        df.groupby(estrato, observed=True, dropna=False, group_keys=False)
+        .sample(frac=limite / len(df), random_state=semente)
+    )
+
+
+def amostrar_dispersao(df, limite=LIMITE_PONTOS, estrato="Grupo", semente=0):
+    """Amostra proporcional por estrato; itens com prejuízo têm prioridade.
+
+    Todos os itens com prejuízo entram enquanto couberem no limite; se só eles
+    já passam do limite (filtro "apenas prejuízo"), são amostrados também.
+    """
+    mascara = em_prejuizo(df)
+    prejuizo = df[mascara]
+    if len(prejuizo) > limite:
+        return _amostrar(prejuizo, limite, estrato, semente)
+
+    demais = _amostrar(df[~mascara], limite - len(prejuizo), estrato, semente)
+    return pd.concat([prejuizo, demais])
+
+
+def grade_densidade(df, celulas=CELULAS_GRADE):
+    contagem, bordas_x, bordas_y = np.histogram2d(
+        df[EIXO_X].to_numpy(dtype="float64"),
+        df[EIXO_Y].to_numpy(dtype="float64"),
+        bins=celulas,
+    )
+    centros_x = (bordas_x[:-1] + bordas_x[1:]) / 2
+    centros_y = (bordas_y[:-1] + bordas_y[1:]) / 2
+    # Células vazias ficam transparentes
+    return centros_x, centros_y, np.where(contagem > 0, contagem, np.nan).T
+
+
+def figura_dispersao(df_scatter, modo=MODO_PONTOS):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    titulo = "Dispersão - Custo Gerencial vs Valor Unitário"
+
+    if modo == MODO_DENSIDADE:
+        centros_x, centros_y, contagem = grade_densidade(df_scatter)
+        fig = go.Figure(go.Heatmap(
+            x=centros_x, y=centros_y, z=contagem,
+            colorscale="Blues", colorbar=dict(title="Itens"),
+        ))
+        fig.update_layout(title=titulo)
+    else:
+        pontos = df_scatter if modo == MODO_PONTOS else amostrar_dispersao(df_scatter)
+        fig = px.scatter(
+            pontos,
+            x=EIXO_X,
+            y=EIXO_Y,
+            color="Grupo",  # pode trocar para "Seção" se preferir
+            hover_data=["DESCRICAO", "Lucro"],
+            render_mode="webgl" if len(pontos) > LIMITE_WEBGL else "svg",
+            title=titulo
+        )
+
+    # Linha de referência (Custo = Valor)
+    max_val = max(df_scatter[EIXO_X].max(), df_scatter[EIXO_Y].max())
+
+    fig.add_shape(
+        type="line",
+        x0=0, y0=0,
+        x1=max_val, y1=max_val,
+        line=dict(color="red", dash="dash"),
+    )
+
+    fig.update_layout(
+        xaxis_title=EIXO_X,
+        yaxis_title=EIXO_Y
+    )
+
+    return fig
+
+
+# --------------------------------------------------
+# CACHE DE FIGURAS
+# --------------------------------------------------
+# Montar uma figura com plotly.express custa mais que a própria tabela. A
+# go.Figure pronta fica guardada pela chave (tabela agregada, tipo, opções).
+# Num acerto não há construção, e st.plotly_chart aceita a go.Figure sem
+# validá-la de novo (um dicionário seria revalidado); resta a cópia e a
+# serialização que o próprio Streamlit faz para enviar ao navegador. O cache
+# é do processo, compartilhado por todas as sessões, com o mesmo LRU por
+# orçamento de memória dos agregados: a figura guardada não deve ser alterada.
+LIMITE_FIGURAS_MB = int(os.environ.get('VENDAS_CACHE_FIGURAS_MB', '128'))
+
+# Texto e categorias: estimativa por valor, como objeto Python
+BYTES_POR_OBJETO = 64
+
+
+def _bytes(valor):
+    if isinstance(valor, np.ndarray):
+        return valor.size * BYTES_POR_OBJETO if valor.dtype == object else valor.nbytes
+    if isinstance(valor, dict):
+        return sum(_bytes(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(_bytes(v) for v in valor) + 8 * len(valor)
+    if isinstance(valor, str):
+        return len(valor)
+    return 0
+
+
+def tamanho_figura_mb(figura):
+    """Memória aproximada dos arrays dos traços; o layout é desprezível."""
+    return sum(_bytes(traco.to_plotly_json()) for traco in figura.data) / 1024 ** 2
+
+
+CACHE_FIGURAS = CacheAgregados(LIMITE_FIGURAS_MB, nome='figuras', medir=tamanho_figura_mb)
+
+
+def chave_figura(tabela, tipo, **opcoes):
+    h = hashlib.sha256()
+    h.update(tipo.encode())
+    h.update(repr(sorted(opcoes.items())).encode())
+    h.update(repr(list(tabela.columns)).encode())
+    h.update(pd.util.hash_pandas_object(tabela, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _para_webgl(figura):
+    """Traços scatter grandes passam a scattergl, qualquer que seja o gráfico de origem."""
+    grandes = [
+        traco.type == 'scatter' and traco.x is not None and len(traco.x) > LIMITE_WEBGL
+        for traco in figura.data
+    ]
+    if not any(grandes):
+        return figura
+
+    import plotly.graph_objects as go
+
+    # Propriedades que só existem no scatter SVG são descartadas
+    tracos = [
+        go.Scattergl(traco.to_plotly_json(), skip_invalid=True) if grande else traco
+        for traco, grande in zip(figura.data, grandes)
+    ]
+    return go.Figure(data=tracos, layout=figura.layout)
+
+
+def figura_em_cache(tabela, tipo, construir, cache=CACHE_FIGURAS, chave=None, **opcoes):
+    """go.Figure montada por construir() só na primeira vez.
+
+    tabela é o que a figura desenha; tipo e opcoes distinguem gráficos feitos
+    da mesma tabela. Para tabelas grandes, chave (ex.: chave_agregado do
+    dataset e dos filtros) identifica os dados sem percorrer a tabela.
+    """
+    if chave is None:
+        chave = chave_figura(tabela, tipo, **opcoes)
+    else:
+        chave = (tipo, chave, tuple(sorted(opcoes.items())))
+    return cache.obter(chave, lambda: _para_webgl(construir()))
@@ -0,0 +1,88 @@
+from agregacao import (
+    criar_agregador, impacto_prejuizo, por_dimensao, por_produto,
+    produtos_com_prejuizo, ranking,
+)
+from classificacao import classificar_matriz, curva_abc
+
+# --------------------------------------------------
+# INDICADORES DA CARTEIRA
+# --------------------------------------------------
+# Os mesmos números dos dashboards, sem depender do Streamlit: usados pelos
+# apps e pelo relatorio_lote.py.
+
+
+def indicadores_carteira(totais, cubo, produtos):
+    total_venda = totais['Valor Total Liquido']
+    total_lucro = totais['Lucro']
+
+    produtos_total = len(produtos)
+    produtos_prejuizo = produtos_com_prejuizo(produtos)
+    top5 = ranking(produtos, 'Valor Total Liquido', n=5)['Valor Total Liquido'].sum()
+
+    return {
+        'faturamento': total_venda,
+        'lucro': total_lucro,
+        'quantidade': totais['Quantidade'],
+        'margem_geral': (total_lucro / total_venda) * 100 if total_venda > 0 else 0,
+        'produtos': produtos_total,
+        'produtos_prejuizo': produtos_prejuizo,
+        'risco_carteira': (produtos_prejuizo / produtos_total) * 100 if produtos_total > 0 else 0,
+        'concentracao_top5': (top5 / total_venda) * 100 if total_venda > 0 else 0,
+        'impacto_prejuizo': impacto_prejuizo(cubo),
+    }
+
+
+def matriz_estrategica(produtos):
+    df_prod = produtos[["DESCRICAO", "Valor Total Liquido", "Lucro", "Quantidade"]]
+
+    # Evitar divisão por zero
+    df_prod = df_prod[df_prod["Valor Total Liquido"] != 0].copy()
+
+    df_prod["Margem %"] = (
+        df_prod["Lucro"] / df_prod["Valor Total Liquido"]
+    ) * 100
+
+    # Garantir tamanho positivo; zeros viram valor mínimo para evitar erro visual
+    df_prod["Quantidade Ajustada"] = df_prod["Quantidade"].abs().replace(0, 1)
+
+    df_prod["Categoria Estratégica"] = classificar_matriz(
+        df_prod["Valor Total Liquido"], df_prod["Margem %"]
+    )
+    return df_prod
+
+
+def margem_por(cubo, coluna):
+    tabela = por_dimensao(cubo, coluna)[[coluna, 'Valor Total Liquido', 'Lucro']]
+    tabela['Margem %'] = tabela['Lucro'] / tabela['Valor Total Liquido'] * 100
+    return tabela
+
+
+def relatorio_carteira(df, arquivo_duckdb=None):
+    """Indicadores e rankings de uma planilha já carregada (com colunas derivadas)."""
+    agregador = criar_agregador(df, arquivo_duckdb)
+    cubo = agregador.cubo()
+    produtos = por_produto(cubo)
+
+    abc = curva_abc(ranking(produtos, 'Valor Total Liquido', n=None))
+
+    indicadores = indicadores_carteira(agregador.totais(), cubo, produtos)
+    for classe in 'ABC':
+        indicadores[f'produtos_classe_{classe}'] = int((abc['Classe ABC'] == classe).sum())
+
+    matriz = matriz_estrategica(produtos)
+    tabelas = {
+        'curva_abc': abc,
+        'top_faturamento': ranking(produtos, 'Valor Total Liquido'),
+        'piores_faturamento': ranking(produtos, 'Valor Total Liquido', crescente=True),
+        'top_lucro': ranking(produtos, 'Lucro'),
+        'destruidores_valor': ranking(produtos, 'Prejuízo Total', crescente=True),
+        'maiores_prejuizos_unitarios': ranking(
+            produtos, 'Margem Negativa Média', crescente=True
+        ).rename(columns={'Margem Negativa Média': 'Margem Unitária'}),
+        'matriz_estrategica': matriz,
+        'consolidado': cubo,
+    }
+    for coluna, nome in [('Grupo', 'margem_grupo'), ('Seção', 'margem_secao')]:
+        if coluna in cubo.columns:
+            tabelas[nome] = margem_por(cubo, coluna)
+    return indicadores, tabelas
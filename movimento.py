@@ -0,0 +1,318 @@
+import hashlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from esbocos import TopK
+
+# --------------------------------------------------
+# LAYOUT DO CSV DE MOVIMENTO DE CAIXA (PDV)
+# --------------------------------------------------
+MAPA_COLUNAS = {
+    'idempresa': 'Caixa',
+    'descrrecebimento': 'Forma de Pagamento',
+    'dtmovimento': 'Data Movimento',
+    'nomeusuario': 'Nome Usuario',
+}
+
+# Só o que as contagens usam é lido do arquivo, já com tipo fixo. A data
+# chega como texto e é convertida bloco a bloco com o FORMATO_DATA.
+TIPOS_COLUNAS = {
+    'idempresa': 'category',
+    'descrrecebimento': 'category',
+    'dtmovimento': 'str',
+    'nomeusuario': 'category',
+}
+
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+# Contagens por hora guardadas para cada uma destas colunas
+DIMENSOES_TEMPO = ['Caixa', 'Nome Usuario', 'Forma de Pagamento']
+
+LINHAS_POR_BLOCO = 200_000
+
+# Rankings de operador e forma de pagamento. Com VENDAS_TOP_K=N, só os N
+# maiores são mantidos (space-saving em memória fixa, recontagem exata no fim);
+# sem a variável, todos os valores são contados. VENDAS_TOP_K_CAPACIDADE
+# define quantos candidatos o esboço monitora (padrão em esbocos.TopK): com
+# mais valores distintos que isso, quem entra nos N maiores é aproximado.
+RANKINGS = ['usuarios', 'formas_pagamento', 'pix_tef_operador']
+TOP_K = int(os.environ.get('VENDAS_TOP_K', '0')) or None
+CAPACIDADE_TOP_K = int(os.environ.get('VENDAS_TOP_K_CAPACIDADE', '0')) or None
+
+# TROCO não é forma de pagamento: fica fora do ranking (e não ocupa vaga no top-k)
+FORMAS_FORA_DO_RANKING = ['TROCO']
+
+
+def _somar(acumulado, parcial):
+    return acumulado.add(parcial, fill_value=0).astype('int64')
+
+
+def _contar(serie):
+    contagem = serie.value_counts()
+    contagem = contagem[contagem > 0]
+    contagem.index = contagem.index.astype(str)
+    return contagem
+
+
+def _vazia_por_hora(dimensao):
+    indice = pd.MultiIndex.from_arrays(
+        [pd.DatetimeIndex([]), pd.Index([], dtype=object)], names=['Hora', dimensao]
+    )
+    return pd.Series(dtype='int64', index=indice)
+
+
+def _contar_por_hora(hora, serie):
+    # Um groupby por bloco sobre (hora cheia, valor); horas inválidas (NaT) ficam fora
+    contagem = serie.groupby([hora, serie], observed=True).size()
+    contagem.index = contagem.index.set_names(['Hora', serie.name])
+    return contagem.rename(index=str, level=1)
+
+
+def _series_rankings(bloco):
+    return {
+        'usuarios': bloco['Nome Usuario'],
+        'formas_pagamento': bloco.loc[
+            ~bloco['Forma de Pagamento'].isin(FORMAS_FORA_DO_RANKING), 'Forma de Pagamento'
+        ],
+        'pix_tef_operador': bloco.loc[
+            bloco['Forma de Pagamento'] == 'PIX TEF', 'Nome Usuario'
+        ],
+    }
+
+
+class ContagemMovimentos:
+    """Contagens do movimento de caixa acumuladas bloco a bloco.
+
+    Com top_k, os rankings são esboços TopK até finalizar() receber as
+    contagens exatas dos candidatos; top_k_exato diz se os candidatos eram
+    todos os valores vistos (sem descartes no esboço).
+    """
+
+    def __init__(self, top_k=None):
+        vazia = pd.Series(dtype='int64')
+        self.top_k = top_k
+        self.top_k_exato = True
+        for nome in RANKINGS:
+            setattr(self, nome, TopK(top_k, CAPACIDADE_TOP_K) if top_k else vazia)
+        self.caixas = vazia
+        self.por_hora = {d: _vazia_por_hora(d) for d in DIMENSOES_TEMPO}
+        # Linhas sem data/hora válida no FORMATO_DATA: ficam fora dos gráficos no tempo
+        self.datas_invalidas = 0
+
+    def atualizar(self, bloco):
+        for nome, serie in _series_rankings(bloco).items():
+            if self.top_k:
+                getattr(self, nome).atualizar(serie)
+            else:
+                setattr(self, nome, _somar(getattr(self, nome), _contar(serie)))
+        self.caixas = _somar(self.caixas, _contar(bloco['Caixa']))
+
+        hora = pd.to_datetime(
+            bloco['Data Movimento'], format=FORMATO_DATA, errors='coerce'
+        ).dt.floor('h')
+        self.datas_invalidas += int(hora.isna().sum())
+        for dimensao in DIMENSOES_TEMPO:
+            self.por_hora[dimensao] = _somar(
+                self.por_hora[dimensao], _contar_por_hora(hora, bloco[dimensao])
+            )
+
+    def somar(self, outra):
+        """Incorpora as contagens de outro arquivo (etapa de redução)."""
+        for nome in RANKINGS:
+            if self.top_k:
+                getattr(self, nome).somar(getattr(outra, nome))
+            else:
+                setattr(self, nome, _somar(getattr(self, nome), getattr(outra, nome)))
+        self.caixas = _somar(self.caixas, outra.caixas)
+        for dimensao in DIMENSOES_TEMPO:
+            self.por_hora[dimensao] = _somar(self.por_hora[dimensao], outra.por_hora[dimensao])
+        self.datas_invalidas += outra.datas_invalidas
+        return self
+
+    def candidatos(self):
+        return {nome: getattr(self, nome).candidatos() for nome in RANKINGS}
+
+    def finalizar(self, exatas):
+        """Troca os esboços pelos k maiores das contagens exatas dos candidatos."""
+        self.top_k_exato = all(getattr(self, nome).exato for nome in RANKINGS)
+        for nome in RANKINGS:
+            setattr(self, nome, exatas[nome].nlargest(self.top_k))
+        return self
+
+    @property
+    def total_vendas(self):
+        return int(self.caixas.sum())
+
+
+def legenda_top_k(contagem):
+    """Aviso sobre os rankings limitados por VENDAS_TOP_K (None sem o limite).
+
+    A lista dos maiores só é dita aproximada quando o esboço descartou
+    candidatos; as contagens exibidas são sempre as da recontagem exata.
+    """
+    if not contagem.top_k:
+        return None
+    if contagem.top_k_exato:
+        return (
+            f'Rankings de operador e forma de pagamento limitados aos {contagem.top_k} '
+            'maiores (VENDAS_TOP_K), com contagem exata.'
+        )
+    return (
+        f'Rankings de operador e forma de pagamento limitados a {contagem.top_k} '
+        'valores (VENDAS_TOP_K). Havia mais valores distintos que os candidatos do '
+        'esboço (VENDAS_TOP_K_CAPACIDADE): a lista dos maiores é aproximada, mas as '
+        'contagens mostradas são exatas.'
+    )
+
+
+def tabela_contagem(serie, nome):
+    tabela = serie.sort_values(ascending=False).rename_axis(nome).reset_index()
+    tabela.columns = [nome, 'Quantidade']
+    return tabela
+
+
+# --------------------------------------------------
+# MOVIMENTO AO LONGO DO TEMPO
+# --------------------------------------------------
+# As contagens ficam por hora cheia; dia e semana saem de um resample sobre
+# elas, sem voltar às linhas do arquivo.
+FREQUENCIAS = {
+    'Hora': 'h',
+    'Dia': 'D',
+    'Semana': 'W-MON',
+}
+
+
+def movimentos_por_periodo(contagem, dimensao, periodo='Dia'):
+    """Uma linha por período e uma coluna por valor da dimensão (zeros incluídos)."""
+    tabela = contagem.por_hora[dimensao].unstack(dimensao, fill_value=0)
+    if tabela.empty:
+        return tabela
+    # Semanas rotuladas pela segunda-feira em que começam
+    tabela = tabela.resample(FREQUENCIAS[periodo], label='left', closed='left').sum()
+    return tabela.rename_axis(index=periodo)
+
+
+def movimentos_por_hora_do_dia(contagem):
+    """Média e pico de movimentos em cada hora do dia, somando todos os caixas.
+
+    Horas sem movimento dentro do período entram como zero na média.
+    """
+    total = movimentos_por_periodo(contagem, 'Caixa', 'Hora').sum(axis=1)
+    tabela = total.groupby(total.index.hour).agg(['mean', 'max'])
+    tabela.index.name = 'Hora do Dia'
+    tabela.columns = ['Média', 'Pico']
+    return tabela
+
+
+def contar_movimentos(arquivo, linhas_por_bloco=LINHAS_POR_BLOCO, top_k=None,
+                      finalizar=True):
+    """Lê o CSV em blocos de tamanho fixo e devolve as contagens agregadas.
+
+    O pico de memória depende do tamanho do bloco, não do arquivo. Com top_k,
+    uma segunda leitura reconta de forma exata só os candidatos do esboço
+    (finalizar=False deixa isso para quem vai somar vários arquivos).
+    """
+    contagem = ContagemMovimentos(top_k)
+    leitor = pd.read_csv(
+        arquivo,
+        sep=',',
+        usecols=list(TIPOS_COLUNAS),
+        dtype=TIPOS_COLUNAS,
+        chunksize=linhas_por_bloco,
+    )
+    with leitor:
+        for bloco in leitor:
+            contagem.atualizar(bloco.rename(columns=MAPA_COLUNAS))
+
+    if top_k and finalizar:
+        if hasattr(arquivo, 'seek'):
+            arquivo.seek(0)
+        contagem.finalizar(recontar(arquivo, contagem.candidatos(), linhas_por_bloco))
+    return contagem
+
+
+def recontar(arquivo, candidatos, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Contagem exata, por ranking, só dos valores candidatos."""
+    exatas = ContagemMovimentos()
+    colunas = ['descrrecebimento', 'nomeusuario']
+    leitor = pd.read_csv(
+        arquivo,
+        sep=',',
+        usecols=colunas,
+        dtype={c: TIPOS_COLUNAS[c] for c in colunas},
+        chunksize=linhas_por_bloco,
+    )
+    with leitor:
+        for bloco in leitor:
+            series = _series_rankings(bloco.rename(columns=MAPA_COLUNAS))
+            for nome, serie in series.items():
+                serie = serie[serie.isin(candidatos[nome])]
+                setattr(exatas, nome, _somar(getattr(exatas, nome), _contar(serie)))
+    return {nome: getattr(exatas, nome) for nome in RANKINGS}
+
+
+# --------------------------------------------------
+# VÁRIOS PDVs EM PARALELO
+# --------------------------------------------------
+def contar_conteudo(conteudo, linhas_por_bloco=LINHAS_POR_BLOCO, top_k=None,
+                    finalizar=True):
+    return contar_movimentos(io.BytesIO(conteudo), linhas_por_bloco, top_k, finalizar)
+
+
+def _contar_esboco(conteudo, top_k):
+    return contar_conteudo(conteudo, top_k=top_k, finalizar=False)
+
+
+def _recontar_conteudo(conteudo, candidatos):
+    return recontar(io.BytesIO(conteudo), candidatos)
+
+
+# O servidor do Streamlit tem várias threads: fork copiaria travas em uso por
+# outras sessões. O forkserver parte de um processo limpo (fora do Linux/macOS,
+# fica o padrão da plataforma).
+def _contexto_processos():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return None
+
+
+def chave_arquivos(conteudos, top_k=TOP_K):
+    """Identifica um conjunto de uploads (hash de cada arquivo, na ordem)."""
+    h = hashlib.sha256(f'top_k={top_k}'.encode())
+    for conteudo in conteudos:
+        h.update(hashlib.sha256(conteudo).digest())
+    return h.hexdigest()
+
+
+def contar_arquivos(conteudos, processos=None, top_k=TOP_K):
+    """Conta cada CSV (bytes) num processo próprio e soma as contagens parciais.
+
+    O tempo total fica próximo ao do maior arquivo, não à soma de todos. Com
+    top_k, os esboços de todos os arquivos são somados antes da recontagem,
+    feita em paralelo com os mesmos candidatos globais.
+    """
+    if len(conteudos) == 1:
+        return contar_conteudo(conteudos[0], top_k=top_k)
+
+    processos = processos or min(len(conteudos), os.cpu_count() or 1)
+    total = ContagemMovimentos(top_k)
+    contexto = _contexto_processos()
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+        for parcial in executor.map(_contar_esboco, conteudos, [top_k] * len(conteudos)):
+            total.somar(parcial)
+        if not top_k:
+            return total
+
+        candidatos = total.candidatos()
+        exatas = {nome: pd.Series(dtype='int64') for nome in RANKINGS}
+        for parcial in executor.map(
+            _recontar_conteudo, conteudos, [candidatos] * len(conteudos)
+        ):
+            for nome in RANKINGS:
+                exatas[nome] = _somar(exatas[nome], parcial[nome])
+    return total.finalizar(exatas)
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+# --------------------------------------------------
+# RASTREIO DE MEMÓRIA COMPARTILHADO
+# --------------------------------------------------
+# O tracemalloc é global ao processo, e as sessões do Streamlit rodam em
+# threads. Cada medição registra-se com _iniciar_rastreio() e sai com
+# _parar_rastreio(): o rastreio só é desligado quando a última sai, e nunca
+# se foi ligado por outro código (ex.: benchmarks/executar.py). Com sessões
+# simultâneas, memória e pico incluem as alocações das outras.
+_trava_rastreio = threading.Lock()
+_medicoes_ativas = 0
+_rastreio_proprio = False
+
+
+def _iniciar_rastreio():
+    global _medicoes_ativas, _rastreio_proprio
+    with _trava_rastreio:
+        if _medicoes_ativas == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _rastreio_proprio = True
+        _medicoes_ativas += 1
+
+
+def _parar_rastreio():
+    global _medicoes_ativas, _rastreio_proprio
+    with _trava_rastreio:
+        _medicoes_ativas -= 1
+        if _medicoes_ativas == 0 and _rastreio_proprio:
+            tracemalloc.stop()
+            _rastreio_proprio = False
+
+
+# --------------------------------------------------
+# MEDIÇÃO DE PICO DE MEMÓRIA
+# --------------------------------------------------
+# Ligada com VENDAS_MEDIR_MEMORIA=1. O rastreio deixa a execução mais lenta:
+# use para acompanhar regressões, não em produção.
+MEDIR_MEMORIA = os.environ.get('VENDAS_MEDIR_MEMORIA') == '1'
+
+
+class MedicaoMemoria:
+
+    def __init__(self, ativa=MEDIR_MEMORIA):
+        self.ativa = ativa
+        if not self.ativa:
+            return
+        _iniciar_rastreio()
+        tracemalloc.reset_peak()
+
+    def encerrar(self):
+        """Encerra a medição e devolve o pico em MB (None se desligada)."""
+        if not self.ativa:
+            return None
+        _, pico = tracemalloc.get_traced_memory()
+        _parar_rastreio()
+        self.ativa = False
+        return pico / 1024 ** 2
+
+    def __del__(self):
+        # Execução interrompida (erro, st.stop, rerun) antes de encerrar()
+        if self.ativa:
+            _parar_rastreio()
+
+
+# --------------------------------------------------
+# PERFIL POR SEÇÃO
+# --------------------------------------------------
+# Ligado com VENDAS_PERFIL=1 para todas as sessões. ?perfil=1 na URL liga só
+# a sessão que pediu, e só se VENDAS_PERFIL_URL=1: o rastreio deixa o
+# processo inteiro mais lento, então um visitante qualquer não pode ligá-lo.
+# Cada seção do dashboard registra tempo, linhas processadas e variação de
+# memória; a tabela vai para a sidebar e cada linha sai também como JSON no
+# logger vendas.perfil.
+PERFIL_ATIVO = os.environ.get('VENDAS_PERFIL') == '1'
+PERFIL_POR_URL = os.environ.get('VENDAS_PERFIL_URL') == '1'
+
+logger = logging.getLogger('vendas.perfil')
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+def perfil_solicitado(query_params):
+    return PERFIL_ATIVO or (PERFIL_POR_URL and query_params.get('perfil') == '1')
+
+
+class PerfilSecoes:
+    """Cronometra seções sequenciais: cada secao() encerra a anterior."""
+
+    def __init__(self, app, ativo=PERFIL_ATIVO):
+        self.app = app
+        self.ativo = ativo
+        self.registros = []
+        self._atual = None
+        self._rastreando = False
+        if self.ativo:
+            _iniciar_rastreio()
+            self._rastreando = True
+
+    def secao(self, nome, linhas=None):
+        if not self.ativo:
+            return
+        self._fechar()
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._atual = (nome, linhas, time.perf_counter(), memoria)
+
+    def _fechar(self):
+        if self._atual is None:
+            return
+        nome, linhas, inicio, memoria_inicio = self._atual
+        memoria, pico = tracemalloc.get_traced_memory()
+        registro = {
+            'app': self.app,
+            'secao': nome,
+            'segundos': round(time.perf_counter() - inicio, 4),
+            'linhas': linhas,
+            'memoria_delta_mb': round((memoria - memoria_inicio) / 1024 ** 2, 2),
+            'memoria_pico_mb': round((pico - memoria_inicio) / 1024 ** 2, 2),
+        }
+        self.registros.append(registro)
+        logger.info(json.dumps(registro, ensure_ascii=False))
+        self._atual = None
+
+    def encerrar(self):
+        """Fecha a última seção e devolve os registros (lista vazia se desligado)."""
+        if not self.ativo:
+            return []
+        self._fechar()
+        if self._rastreando:
+            _parar_rastreio()
+            self._rastreando = False
+        return self.registros
+
+    def __del__(self):
+        # Execução interrompida (erro, st.stop, rerun) antes de encerrar()
+        if self._rastreando:
+            _parar_rastreio()
+
+
+def exibir_perfil(registros, container):
+    """Mostra a tabela do perfil (ex.: st.sidebar) quando houver registros."""
+    if not registros:
+        return
+    container.subheader("Perfil de execução")
+    container.dataframe(
+        [{k: v for k, v in r.items() if k != 'app'} for r in registros],
+        hide_index=True,
+    )
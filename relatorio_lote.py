@@ -0,0 +1,123 @@
+"""Calcula os indicadores e rankings dos dashboards sem abrir o Streamlit.
+
+Cada planilha gerencial (.xlsx) é processada num processo separado e gera
+uma pasta com indicadores.json, uma tabela por ranking e o consolidado.parquet
+que vendaCEO.py e vendaESTRATEGICA.py abrem no lugar da planilha:
+
+    python relatorio_lote.py loja01.xlsx loja02.xlsx -o relatorios/
+    python relatorio_lote.py exportacoes/*.xlsx -o relatorios/ --formato json -p 8
+
+As planilhas convertidas ficam em <saida>/.cache (ou --cache), separadas do
+cache dos dashboards: um lote grande não descarta as entradas dos usuários
+nem depende de um HOME gravável. --sem-cache lê sempre o .xlsx.
+
+Com mais de uma planilha, rede.json traz os indicadores somados entre lojas
+(produtos distintos, risco da carteira e percentis por produto), estimados
+por esboços (esbocos.py) sem juntar as tabelas das lojas.
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from agregacao import por_produto
+from carga import CacheColunar, carregar_planilha
+from consolidado import gravar_consolidado
+from derivadas import adicionar_colunas_derivadas
+from esbocos import EsbocoCarteira
+from indicadores import relatorio_carteira
+
+
+def gravar_tabela(tabela, destino, formato):
+    if formato == 'parquet':
+        tabela.to_parquet(destino.with_suffix('.parquet'), index=False)
+    else:
+        tabela.to_json(
+            destino.with_suffix('.json'), orient='records', force_ascii=False, indent=2
+        )
+
+
+def processar_arquivo(arquivo, saida, formato, cache=False):
+    arquivo = Path(arquivo)
+    data = adicionar_colunas_derivadas(carregar_planilha(arquivo.read_bytes(), cache))
+    indicadores, tabelas = relatorio_carteira(data)
+
+    destino = Path(saida) / arquivo.stem
+    destino.mkdir(parents=True, exist_ok=True)
+
+    indicadores = {'arquivo': arquivo.name, 'linhas': len(data), **indicadores}
+    with open(destino / 'indicadores.json', 'w', encoding='utf-8') as f:
+        json.dump(indicadores, f, ensure_ascii=False, indent=2, default=lambda v: v.item())
+
+    # Lido pelos dashboards: sempre em Parquet, qualquer que seja o formato
+    consolidado = tabelas.pop('consolidado')
+    gravar_consolidado(consolidado, destino / 'consolidado.parquet')
+    for nome, tabela in tabelas.items():
+        gravar_tabela(tabela, destino / nome, formato)
+
+    # Volta para o processo principal, que soma os esboços de todas as lojas
+    esboco = EsbocoCarteira().atualizar(por_produto(consolidado))
+    return destino, esboco
+
+
+def gravar_rede(esboco, saida):
+    destino = Path(saida) / 'rede.json'
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump(esboco.indicadores(), f, ensure_ascii=False, indent=2)
+    return destino
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('arquivos', nargs='+', help='planilhas gerenciais (.xlsx)')
+    parser.add_argument('-o', '--saida', default='relatorios', help='pasta de destino')
+    parser.add_argument('--formato', choices=['parquet', 'json'], default='parquet')
+    parser.add_argument(
+        '-p', '--processos', type=int, default=None,
+        help='processos em paralelo (padrão: número de CPUs)'
+    )
+    parser.add_argument(
+        '--cache', default=None,
+        help='pasta do cache das planilhas convertidas (padrão: <saida>/.cache)'
+    )
+    parser.add_argument(
+        '--sem-cache', action='store_true', help='não grava nem lê planilhas convertidas'
+    )
+    args = parser.parse_args(argv)
+
+    cache = False
+    if not args.sem_cache:
+        cache = CacheColunar(args.cache or Path(args.saida) / '.cache')
+
+    falhas = 0
+    esbocos = {}
+    with ProcessPoolExecutor(max_workers=args.processos) as executor:
+        tarefas = {
+            executor.submit(
+                processar_arquivo, arquivo, args.saida, args.formato, cache
+            ): (posicao, arquivo)
+            for posicao, arquivo in enumerate(args.arquivos)
+        }
+        for tarefa in as_completed(tarefas):
+            posicao, arquivo = tarefas[tarefa]
+            try:
+                destino, esboco = tarefa.result()
+                esbocos[posicao] = esboco
+                print(f'{arquivo}: {destino}')
+            except Exception as e:
+                falhas += 1
+                print(f'{arquivo}: erro ao processar o arquivo: {e}', file=sys.stderr)
+
+    # Soma na ordem dos argumentos, não na de conclusão: rede.json reproduzível
+    rede = EsbocoCarteira()
+    for posicao in sorted(esbocos):
+        rede.somar(esbocos[posicao])
+
+    if rede.lojas > 1:
+        print(f'rede: {gravar_rede(rede, args.saida)}')
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Paridade entre os backends pandas e DuckDB de agregacao.py.
+
+Cobre os dois caminhos do DuckDB: o DataFrame registrado em memória
+(arquivo=None, o usado pelo venda.py sobre recortes filtrados) e a tabela
+gravada num .duckdb. As chaves têm DESCRICAO e Grupo vazios. Rankings, curva
+ABC, margens por dimensão e indicadores de prejuízo são conferidos sobre
+produtos com totais empatados, que as somas em ordens diferentes desempatam.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from agregacao import (  # noqa: E402
+    CHAVES_CUBO, COLUNAS_TOTAIS, criar_agregador, impacto_prejuizo, por_dimensao,
+    por_produto, produtos_com_prejuizo, ranking,
+)
+from classificacao import curva_abc  # noqa: E402
+from derivadas import adicionar_colunas_derivadas  # noqa: E402
+from esquema import aplicar_esquema  # noqa: E402
+from filtros import IndiceFiltros  # noqa: E402
+
+# A ordem das somas em ponto flutuante não é a mesma nos dois backends
+TOLERANCIA = 1e-6
+
+
+def _itens_brutos(rng, n):
+    descricao = rng.choice([f'PRODUTO {i:03d}' for i in range(80)], n).astype(object)
+    grupo = rng.choice(['BEBIDAS', 'MERCEARIA', 'LIMPEZA', 'HORTIFRUTI'], n).astype(object)
+    descricao[rng.random(n) < 0.02] = np.nan
+    grupo[rng.random(n) < 0.05] = np.nan
+
+    preco = rng.lognormal(2.3, 0.8, n).round(2)
+    custo = (preco / rng.normal(1.2, 0.2, n)).round(2)
+    custo[rng.random(n) < 0.01] = 0
+    quantidade = rng.integers(1, 7, n)
+    return pd.DataFrame({
+        'DESCRICAO': descricao,
+        'Seção': rng.choice(['ALIMENTOS', 'NAO ALIMENTOS'], n),
+        'Grupo': grupo,
+        'Valor Unitário Bruto': preco,
+        'Custo Gerencial': custo,
+        'Quantidade': quantidade,
+        'Valor Total Liquido': (preco * quantidade).round(2),
+        'Lucro': ((preco - custo) * quantidade).round(2),
+    })
+
+
+def _empatados(rng, produtos=30, linhas=40):
+    # Cada produto recebe as mesmas linhas em outra ordem: totais iguais em
+    # centavos, mas somados em ordens diferentes
+    base = _itens_brutos(rng, linhas).assign(DESCRICAO=None, Grupo='EMPATES')
+    return pd.concat([
+        base.sample(frac=1, random_state=i).assign(DESCRICAO=f'EMPATE {i:02d}')
+        for i in range(produtos)
+    ], ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def itens():
+    bruto = _itens_brutos(np.random.default_rng(0), 5_000)
+    return adicionar_colunas_derivadas(aplicar_esquema(bruto))
+
+
+@pytest.fixture(scope='module')
+def itens_empatados():
+    rng = np.random.default_rng(1)
+    bruto = pd.concat([_itens_brutos(rng, 5_000), _empatados(rng)], ignore_index=True)
+    return adicionar_colunas_derivadas(aplicar_esquema(bruto))
+
+
+@pytest.fixture(scope='module', params=['memoria', 'arquivo'])
+def cubos(request, itens_empatados, tmp_path_factory):
+    """Cubo do pandas e do DuckDB, pelo registro em memória ou pelo .duckdb."""
+    arquivo = None
+    if request.param == 'arquivo':
+        arquivo = tmp_path_factory.mktemp('duckdb') / 'itens.duckdb'
+    pandas = criar_agregador(itens_empatados, backend='pandas').cubo()
+    duckdb = criar_agregador(itens_empatados, arquivo, backend='duckdb').cubo()
+    return pandas, duckdb
+
+
+def _cubo_comparavel(cubo):
+    # Chaves como texto (NaN/NULL viram None) e linhas numa ordem fixa
+    cubo = cubo.copy()
+    for chave in CHAVES_CUBO:
+        cubo[chave] = cubo[chave].astype(object).where(cubo[chave].notna(), None)
+    cubo = cubo.sort_values(CHAVES_CUBO, na_position='first').reset_index(drop=True)
+    return cubo[sorted(cubo.columns)]
+
+
+def _conferir(df, arquivo=None):
+    pandas = criar_agregador(df, backend='pandas')
+    duckdb = criar_agregador(df, arquivo, backend='duckdb')
+
+    esperado, obtido = pandas.totais(), duckdb.totais()
+    for coluna in COLUNAS_TOTAIS:
+        assert obtido[coluna] == pytest.approx(esperado[coluna], rel=TOLERANCIA)
+
+    pd.testing.assert_frame_equal(
+        _cubo_comparavel(pandas.cubo()), _cubo_comparavel(duckdb.cubo()),
+        check_dtype=False, rtol=TOLERANCIA,
+    )
+
+
+def test_registro_em_memoria(itens):
+    _conferir(itens)
+
+
+def test_arquivo_duckdb(itens, tmp_path):
+    _conferir(itens, tmp_path / 'itens.duckdb')
+
+
+def test_recorte_filtrado(itens):
+    # Mesmo caminho do venda.py: take pelo índice de filtros, DuckDB em memória
+    indice = IndiceFiltros(itens, ['DESCRICAO', 'Seção', 'Grupo'])
+    recorte = indice.filtrar(itens, {'Grupo': ['BEBIDAS', 'LIMPEZA'], 'Seção': ['ALIMENTOS']})
+    assert 0 < len(recorte) < len(itens)
+    _conferir(recorte)
+
+
+def test_apenas_prejuizo(itens):
+    _conferir(itens[itens['Status'] == 'Prejuízo'])
+
+
+def test_chaves_vazias_formam_grupo(itens):
+    cubo = criar_agregador(itens, backend='duckdb').cubo()
+    assert cubo['DESCRICAO'].isna().any()
+    assert cubo['Grupo'].isna().any()
+    assert cubo['Linhas'].sum() == len(itens)
+
+
+def test_sem_colunas_derivadas(itens):
+    # Margem e prejuízo calculados pelo próprio backend
+    _conferir(itens.drop(columns=['Margem Unitária', 'Prejuízo Total']))
+
+
+def test_recorte_vazio(itens):
+    vazio = itens.iloc[:0]
+    assert criar_agregador(vazio, backend='duckdb').totais() == dict.fromkeys(COLUNAS_TOTAIS, 0.0)
+    assert criar_agregador(vazio, backend='duckdb').cubo().empty
+
+
+# --------------------------------------------------
+# SAÍDAS DERIVADAS DO CUBO
+# --------------------------------------------------
+@pytest.mark.parametrize('coluna, crescente', [
+    ('Valor Total Liquido', False),
+    ('Valor Total Liquido', True),
+    ('Lucro', False),
+    ('Prejuízo Total', True),
+    ('Margem Negativa Média', True),
+])
+def test_ranking(cubos, coluna, crescente):
+    esperado, obtido = (
+        ranking(por_produto(cubo), coluna, n=None, crescente=crescente) for cubo in cubos
+    )
+    assert obtido['DESCRICAO'].tolist() == esperado['DESCRICAO'].tolist()
+    np.testing.assert_allclose(obtido[coluna], esperado[coluna], rtol=TOLERANCIA)
+
+
+def test_ranking_desempata_pela_descricao(cubos):
+    top = ranking(por_produto(cubos[1]), 'Valor Total Liquido', n=None)
+    empates = top[top['DESCRICAO'].str.startswith('EMPATE')]['DESCRICAO'].tolist()
+    assert len(empates) == 30
+    assert empates == sorted(empates)
+
+
+def test_curva_abc(cubos):
+    esperado, obtido = (
+        curva_abc(ranking(por_produto(cubo), 'Valor Total Liquido', n=None)) for cubo in cubos
+    )
+    pd.testing.assert_frame_equal(obtido, esperado, rtol=TOLERANCIA)
+
+
+@pytest.mark.parametrize('coluna', ['Seção', 'Grupo'])
+def test_por_dimensao(cubos, coluna):
+    esperado, obtido = (
+        por_dimensao(cubo, coluna).sort_values(coluna).reset_index(drop=True) for cubo in cubos
+    )
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, rtol=TOLERANCIA)
+
+
+def test_indicadores_de_prejuizo(cubos):
+    esperado, obtido = cubos
+    assert produtos_com_prejuizo(por_produto(obtido)) == produtos_com_prejuizo(por_produto(esperado))
+    assert produtos_com_prejuizo(por_produto(esperado)) > 0
+    assert impacto_prejuizo(obtido) == pytest.approx(impacto_prejuizo(esperado), rel=TOLERANCIA)
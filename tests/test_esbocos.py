@@ -0,0 +1,158 @@
+"""Erro dos esboços (esbocos.py) dentro do documentado, com sementes fixas.
+
+HyperLogLog: erro padrão de 0,8%, a menos de 1,6% em ~95% dos casos. KLL:
+erro de posição em torno de 1,7%. TopK: exato até a capacidade; acima dela,
+os valores frequentes continuam entre os candidatos. Os valores chegam em
+blocos e metade vai para um segundo esboço somado no final, como no
+relatorio_lote.py.
+"""
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agregacao import por_produto
+from carga import tratar_planilha
+from derivadas import adicionar_colunas_derivadas
+from esbocos import CAPACIDADE_MINIMA, ContagemDistinta, EsbocoCarteira, EsbocoQuantis, TopK
+from indicadores import relatorio_carteira
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+from gerar_dados import gerar_itens  # noqa: E402
+
+ERRO_HLL = 0.016
+ERRO_POSICAO_KLL = 0.017
+BLOCOS = 10
+
+
+def _em_dois_esbocos(criar, valores):
+    esbocos = [criar(), criar()]
+    for i, bloco in enumerate(np.array_split(valores, BLOCOS)):
+        esbocos[i % 2].atualizar(bloco)
+    return esbocos[0].somar(esbocos[1])
+
+
+@pytest.mark.parametrize('distintos', [500, 20_000, 200_000])
+def test_hyperloglog_dentro_do_erro(distintos):
+    rng = np.random.default_rng(0)
+    codigos = rng.integers(0, distintos, distintos * 3)
+    # Todos os códigos aparecem ao menos uma vez: o exato é `distintos`
+    codigos[:distintos] = np.arange(distintos)
+    valores = np.char.add('PRODUTO ', codigos.astype(str)).astype(object)
+
+    estimativa = _em_dois_esbocos(ContagemDistinta, valores).estimativa()
+    assert abs(estimativa / distintos - 1) < ERRO_HLL
+
+
+def test_hyperloglog_conta_categorias_pelo_texto():
+    texto = pd.Series(['A', 'B', 'C', 'A', None])
+    categorica = texto.astype('category')
+    assert np.array_equal(
+        ContagemDistinta().atualizar(texto).registradores,
+        ContagemDistinta().atualizar(categorica).registradores,
+    )
+
+
+@pytest.mark.parametrize('n', [10_000, 300_000])
+def test_kll_dentro_do_erro_de_posicao(n):
+    rng = np.random.default_rng(1)
+    valores = rng.lognormal(3.0, 1.0, n)
+    qs = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+    estimados = _em_dois_esbocos(lambda: EsbocoQuantis(semente=0), valores).quantis(qs)
+    posicoes = np.searchsorted(np.sort(valores), estimados) / n
+    assert np.all(np.abs(posicoes - qs) < ERRO_POSICAO_KLL)
+
+
+def test_kll_vazio_e_nan():
+    assert np.isnan(EsbocoQuantis().mediana())
+    assert EsbocoQuantis().atualizar([np.nan, 2.0, np.nan]).mediana() == 2.0
+
+
+# --------------------------------------------------
+# TOP-K
+# --------------------------------------------------
+def _fluxo(distintos, n=50_000, semente=2):
+    # Frequências de cauda longa, como operadores e formas de pagamento
+    rng = np.random.default_rng(semente)
+    codigos = np.minimum(rng.zipf(1.3, n), distintos) - 1
+    return np.char.add('VALOR ', codigos.astype(str)).astype(object)
+
+
+def test_top_k_capacidade():
+    assert TopK(10).capacidade == CAPACIDADE_MINIMA
+    assert TopK(500).capacidade == 5_000
+    assert TopK(10, capacidade=50).capacidade == 50
+
+
+@pytest.mark.parametrize('distintos', [40, CAPACIDADE_MINIMA])
+def test_top_k_exato_ate_a_capacidade(distintos):
+    valores = _fluxo(distintos)
+    esboco = _em_dois_esbocos(lambda: TopK(10), valores)
+
+    assert esboco.exato
+    exato = Counter(valores)
+    assert dict(esboco.estimativa()) == {v: exato[v] for v in esboco.estimativa().index}
+    # Empates no décimo lugar podem trazer outro valor com a mesma contagem
+    assert sorted(esboco.estimativa(), reverse=True) == [c for _, c in exato.most_common(10)]
+
+
+def test_top_k_acima_da_capacidade():
+    valores = _fluxo(5_000)
+    esboco = _em_dois_esbocos(lambda: TopK(10, capacidade=200), valores)
+
+    assert not esboco.exato
+    exato = Counter(valores)
+    # Quem passa de total/capacidade nunca sai dos candidatos
+    frequentes = {v for v, c in exato.items() if c > len(valores) / 200}
+    assert frequentes <= set(esboco.candidatos())
+    # A recontagem exata dos candidatos devolve os mesmos 10 maiores
+    recontagem = Counter({v: exato[v] for v in esboco.candidatos()})
+    assert recontagem.most_common(10) == exato.most_common(10)
+    for valor, contagem in esboco.estimativa().items():
+        assert contagem >= exato[valor]
+
+
+# --------------------------------------------------
+# REDE (rede.json)
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def lojas():
+    """Tabela por produto de cada loja, como sai do processar_arquivo."""
+    tabelas = []
+    for semente in range(4):
+        itens = adicionar_colunas_derivadas(tratar_planilha(gerar_itens(3_000, semente)))
+        _, relatorio = relatorio_carteira(itens)
+        tabelas.append(por_produto(relatorio['consolidado']))
+    return tabelas
+
+
+def _rede(lojas):
+    # Como o relatorio_lote.py: um esboço por loja, somados na ordem dada
+    rede = EsbocoCarteira()
+    for produtos in lojas:
+        rede.somar(EsbocoCarteira().atualizar(produtos))
+    return rede.indicadores()
+
+
+def test_rede_reproduzivel(lojas):
+    primeira = json.dumps(_rede(lojas))
+    assert all(json.dumps(_rede(lojas)) == primeira for _ in range(3))
+
+
+def test_rede_perto_do_exato(lojas):
+    indicadores = _rede(lojas)
+    todos = pd.concat(lojas)
+    com_venda = todos[todos['Valor Total Liquido'] != 0]
+    venda = np.sort(com_venda['Valor Total Liquido'].to_numpy())
+
+    assert indicadores['lojas'] == len(lojas)
+    exatos = todos['DESCRICAO'].nunique()
+    assert abs(indicadores['produtos_distintos'] / exatos - 1) < ERRO_HLL
+    posicao = np.searchsorted(venda, indicadores['venda_produto_mediana']) / len(venda)
+    assert abs(posicao - 0.5) < ERRO_POSICAO_KLL
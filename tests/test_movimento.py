@@ -0,0 +1,66 @@
+"""Rankings do movimento de caixa (movimento.py) com VENDAS_TOP_K.
+
+Até a capacidade do esboço, os k maiores são os da contagem completa e a
+legenda fala em contagem exata; acima dela, a legenda avisa que a lista é
+aproximada.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import movimento
+from movimento import contar_conteudo, legenda_top_k
+
+TOP_K = 5
+
+
+def _csv(operadores, n=20_000, semente=3):
+    rng = np.random.default_rng(semente)
+    operador = np.minimum(rng.zipf(1.3, n), operadores)
+    formas = np.array(['DINHEIRO', 'PIX TEF', 'CARTAO DEBITO', 'TROCO'])
+    tabela = pd.DataFrame({
+        'idempresa': rng.integers(1, 5, n),
+        'descrrecebimento': formas[rng.choice(4, n, p=[0.3, 0.3, 0.2, 0.2])],
+        'dtmovimento': '2024-01-01 10:00:00',
+        'nomeusuario': np.char.add('OPERADOR ', operador.astype(str)),
+    })
+    saida = io.StringIO()
+    tabela.to_csv(saida, index=False)
+    return saida.getvalue().encode()
+
+
+def _exatos(conteudo):
+    return contar_conteudo(conteudo, linhas_por_bloco=4_000)
+
+
+@pytest.mark.parametrize('capacidade, exato', [(None, True), (20, False)])
+def test_rankings_e_legenda(monkeypatch, capacidade, exato):
+    monkeypatch.setattr(movimento, 'CAPACIDADE_TOP_K', capacidade)
+    conteudo = _csv(operadores=300)
+
+    contagem = contar_conteudo(conteudo, linhas_por_bloco=4_000, top_k=TOP_K)
+    completa = _exatos(conteudo)
+
+    assert contagem.top_k_exato is exato
+    legenda = legenda_top_k(contagem)
+    assert ('aproximada' in legenda) is not exato
+    assert ('contagem exata' in legenda) is exato
+    # A recontagem deixa as contagens exatas mesmo quando a lista é aproximada
+    for nome in movimento.RANKINGS:
+        obtido = getattr(contagem, nome)
+        assert len(obtido) <= TOP_K
+        assert (obtido == getattr(completa, nome)[obtido.index]).all()
+        if exato:
+            assert sorted(obtido) == sorted(getattr(completa, nome).nlargest(TOP_K))
+
+
+def test_sem_top_k_sem_legenda():
+    assert legenda_top_k(_exatos(_csv(operadores=10))) is None
+
+
+def test_troco_fora_do_ranking():
+    contagem = contar_conteudo(_csv(operadores=10), top_k=TOP_K)
+    assert 'TROCO' not in contagem.formas_pagamento.index
+    assert len(contagem.formas_pagamento) == 3
@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+from perfil import MedicaoMemoria, PerfilSecoes, exibir_perfil, perfil_solicitado
 
 # --------------------------------------------------
 # CONFIGURAÇÃO DA PÁGINA
@@ -8,197 +8,160 @@ import plotly.express as px
 st.set_page_config(layout="wide", page_title="Análise Adão e Eva")
 
 # --------------------------------------------------
-# FUNÇÃO PARA CARREGAR E TRATAR DADOS
+# ÍNDICES E CACHES POR DATASET
 # --------------------------------------------------
-@st.cache_data
-def carregar_dados(uploaded_file):
-    data = pd.read_excel(uploaded_file)
-
-    # Remover colunas desnecessárias
-    cols_to_drop = [
-        'IDSUBPRODUTO', 'REFERENCIA',
-        'IDSECAO', 'IDSUBGRUPO'
-    ]
-    #se não encontrar a coluna, não lançar erro
-    data = data.drop(columns=cols_to_drop, errors='ignore')
-
-    # Renomear colunas
-    data = data.rename(columns={
-        'QTDPRODUTO': 'Quantidade',
-        'LUCRO': 'Lucro',
-        'CUSTOGERENCIAL': 'Custo Gerencial',
-        'CUSTONOTAFISCAL': 'Custo Nota Fiscal',
-        'VALTOTLIQUIDO': 'Valor Total Liquido',
-        'VALUNITBRUTO': 'Valor Unitário Bruto',
-        'DESCRSECAO': 'Seção',
-        'IDPRODUTO': 'Código Produto',
-        'DESCRGRUPO': 'Grupo',
-    })
-
-    return data
+# Índices por planilha carregada: o limite acompanha o de carregar_dados
+@st.cache_resource(max_entries=3)
+def indexar_filtros(_data, chave):
+    # Montado uma vez por dataset; o parâmetro chave identifica a planilha
+    return IndiceFiltros(_data, ['DESCRICAO', 'Seção', 'Grupo'])
 
-# --------------------------------------------------
-# SIDEBAR
-# --------------------------------------------------
-with st.sidebar:
-    st.image("logo.png", width=200)
-    st.header("Configurações de Dados")
 
-    uploaded_file = st.file_uploader(
-        "Faça upload da planilha Excel (.xlsx)",
-        type=['xlsx']
-    )
+@st.cache_resource(max_entries=3)
+def indexar_busca(_data, chave):
+    # Busca por descrição: o navegador recebe só as sugestões, nunca a lista toda
+    return BuscaTextual(_data['DESCRICAO'])
 
-    if uploaded_file:
-        st.success("Arquivo pronto para análise!")
-    else:
-        st.info("Aguardando arquivo...")
-        
-    mostrar_prejuizo = st.checkbox("Mostrar apenas produtos com prejuízo")
+
+@st.cache_resource
+def cache_agregados():
+    # Um só cache para todas as sessões; a chave inclui o hash da planilha
+    return CacheAgregados()
 
 # --------------------------------------------------
-# ÁREA PRINCIPAL
+# SEÇÕES COM EXECUÇÃO PRÓPRIA (st.fragment)
 # --------------------------------------------------
-st.title("Análise de Venda Gerencial - Grupo Adão e Eva")
-
-if uploaded_file is not None:
-    try:
-        data = carregar_dados(uploaded_file)
-
-        # ---------------- FILTROS ----------------
-        with st.sidebar:
-            st.divider()
-            st.subheader("Filtros Avançados")
-
-            descricao = st.multiselect(
-                "Descrição",
-                options=data['DESCRICAO'].unique()
-            )
+# Um widget dentro de um fragmento reexecuta só o fragmento: marcar "apenas
+# prejuízo" refaz o cubo e os gráficos de produtos sem recarregar a página,
+# e trocar a exibição da dispersão refaz só a dispersão. Os filtros da
+# sidebar continuam reexecutando tudo, pois mudam todas as seções.
+@st.fragment
+def painel_dispersao(df_filtrado, chave):
+    st.subheader("Análise: Custo Gerencial vs Valor Unitário")
+
+    # Remover valores nulos ou zero (só as colunas do gráfico, sem cópia do frame)
+    df_scatter = df_filtrado.loc[
+        (df_filtrado["Valor Unitário Bruto"] > 0) &
+        (df_filtrado["Custo Gerencial"] > 0),
+        ["Valor Unitário Bruto", "Custo Gerencial", "Grupo", "DESCRICAO", "Lucro"]
+    ]
 
-            secao = st.multiselect(
-                "Seção",
-                options=data['Seção'].unique()
+    # Com muitos itens, não enviar todas as linhas ao navegador
+    modo_dispersao = MODO_PONTOS
+    if len(df_scatter) > LIMITE_PONTOS:
+        itens_prejuizo = int(em_prejuizo(df_scatter).sum())
+        cabem_prejuizos = itens_prejuizo <= LIMITE_PONTOS
+        # Se nem os itens com prejuízo cabem na amostra, começa pela densidade
+        modo_dispersao = st.radio(
+            "Exibição",
+            [MODO_AMOSTRA, MODO_DENSIDADE],
+            index=0 if cabem_prejuizos else 1,
+            horizontal=True
+        )
+        if cabem_prejuizos:
+            st.caption(
+                f"{len(df_scatter):,} itens. A amostra mantém todos os itens com prejuízo."
             )
-
-            grupo = st.multiselect(
-                "Grupo",
-                options=data['Grupo'].unique()
+        else:
+            st.caption(
+                f"{len(df_scatter):,} itens, {itens_prejuizo:,} com prejuízo: acima de "
+                f"{LIMITE_PONTOS:,}, a amostra também reduz os itens com prejuízo. "
+                "O mapa de densidade considera todos."
             )
 
-        df_filtrado = data.copy()
+    fig_scatter = figura_em_cache(
+        df_scatter, 'dispersao',
+        lambda: figura_dispersao(df_scatter, modo_dispersao),
+        chave=chave, modo=modo_dispersao
+    )
 
-        if descricao:
-            df_filtrado = df_filtrado[df_filtrado['DESCRICAO'].isin(descricao)]
-        if secao:
-            df_filtrado = df_filtrado[df_filtrado['Seção'].isin(secao)]
-        if grupo:
-            df_filtrado = df_filtrado[df_filtrado['Grupo'].isin(grupo)]
+    st.plotly_chart(fig_scatter, use_container_width=True)
 
-        # ---------------- MÉTRICAS ----------------
-        st.subheader("Resumo Geral")
 
-        total_venda = df_filtrado['Valor Total Liquido'].sum()
-        total_lucro = df_filtrado['Lucro'].sum()
-        total_qtd = df_filtrado['Quantidade'].sum()
+@st.fragment
+def painel_produtos(df_filtrado, chave_dataset, selecao, perfil_ativo):
+    import plotly.express as px
 
-        lucratividade = (
-            (total_lucro / total_venda) * 100
-            if total_venda > 0 else 0
-        )
-
-        m1, m2, m3, m4 = st.columns(4)
-
-        m1.metric("Faturamento Total", f"R$ {total_venda:,.2f}")
-        m2.metric("Lucro Total", f"R$ {total_lucro:,.2f}")
-        m3.metric("Qtd Itens Vendidos", f"{total_qtd:,.0f}")
-        m4.metric("Lucratividade %", f"{lucratividade:.2f}%")
-        
-        st.divider()
-
-      # ---------------- Prejuizo ----------------
+    # Numa reexecução do fragmento o script principal não roda: o perfil é próprio
+    perfil = PerfilSecoes("venda.py", perfil_ativo)
+    try:
+        # ---------------- Prejuizo ----------------
+        mostrar_prejuizo = st.checkbox("Mostrar apenas produtos com prejuízo")
         if mostrar_prejuizo:
-            df_filtrado = df_filtrado[
-            df_filtrado["Valor Unitário Bruto"] <
-            df_filtrado["Custo Gerencial"]
-    ]
+            df_filtrado = df_filtrado[df_filtrado["Status"] == "Prejuízo"]
+
+        # ---------------- CUBO DE PRODUTOS ----------------
+        perfil.secao("Cubo de Produtos", len(df_filtrado))
+        # Um único groupby alimenta todos os rankings e indicadores abaixo;
+        # uma combinação de filtros já vista sai pronta do cache
+        def calcular_cubo():
+            cubo = criar_agregador(df_filtrado).cubo()
+            return cubo, por_produto(cubo)
+
+        cubo, produtos = cache_agregados().obter(
+            chave_agregado('cubo', chave_dataset, selecao, mostrar_prejuizo),
+            calcular_cubo
+        )
       
         # ---------------- TOP 10 ----------------
+        perfil.secao("Performance Positiva", len(produtos))
         st.subheader("Performance Positiva")
 
-        top_produtos = (
-            df_filtrado
-            .groupby('DESCRICAO')['Valor Total Liquido']
-            .sum()
-            .sort_values(ascending=False)
-            .head(10)
-            .reset_index()
-        )
+        top_produtos = ranking(produtos, 'Valor Total Liquido')
 
-        fig_top = px.bar(
+        fig_top = figura_em_cache(top_produtos, 'top', lambda: px.bar(
             top_produtos,
             x='Valor Total Liquido',
             y='DESCRICAO',
             orientation='h',
             color='Valor Total Liquido',
             color_continuous_scale='Blues'
-        )
-
-        fig_top.update_layout(yaxis={'categoryorder': 'total ascending'})
+        ).update_layout(yaxis={'categoryorder': 'total ascending'}))
         st.plotly_chart(fig_top, use_container_width=True)
 
         st.divider()
 
         # ---------------- PIORES PRODUTOS ----------------
+        perfil.secao("Baixo Desempenho", len(produtos))
         st.subheader("Análise de Baixo Desempenho")
 
-        piores_produtos = (
-            df_filtrado
-            .groupby('DESCRICAO')['Valor Total Liquido']
-            .sum()
-            .sort_values()
-            .head(10)
-            .reset_index()
-        )
+        piores_produtos = ranking(produtos, 'Valor Total Liquido', crescente=True)
 
-        fig_piores = px.bar(
+        fig_piores = figura_em_cache(piores_produtos, 'piores', lambda: px.bar(
             piores_produtos,
             x='Valor Total Liquido',
             y='DESCRICAO',
             orientation='h',
             color='Valor Total Liquido',
             color_continuous_scale='Reds'
-        )
-
-        fig_piores.update_layout(yaxis={'categoryorder': 'total descending'})
+        ).update_layout(yaxis={'categoryorder': 'total descending'}))
         st.plotly_chart(fig_piores, use_container_width=True)
 
         st.divider()
 
         # ---------------- GRÁFICOS DE LUCRATIVIDADE ----------------
+        perfil.secao("Lucratividade por Seção e Grupo", len(cubo))
         col1, col2 = st.columns(2)
 
         # Lucratividade por Seção
         with col1:
             st.subheader("Lucratividade por Seção")
 
-            df_secao = (
-                df_filtrado
-                .groupby("Seção")
-                .agg({"Valor Total Liquido": "sum", "Lucro": "sum"})
-                .reset_index()
-            )
+            df_secao = por_dimensao(cubo, "Seção")[
+                ["Seção", "Valor Total Liquido", "Lucro"]
+            ]
 
             df_secao["Lucratividade %"] = (
                 df_secao["Lucro"] /
                 df_secao["Valor Total Liquido"]
             ) * 100
 
-            fig_secao = px.pie(
+            fig_secao = figura_em_cache(df_secao, 'pizza', lambda: px.pie(
                 df_secao,
                 names="Seção",
                 values="Lucratividade %",
                 hole=0.4
-            )
+            ))
 
             st.plotly_chart(fig_secao, use_container_width=True)
 
@@ -206,84 +169,40 @@ if uploaded_file is not None:
         with col2:
             st.subheader("Lucratividade por Grupo")
 
-            df_grupo = (
-                df_filtrado
-                .groupby("Grupo")
-                .agg({"Valor Total Liquido": "sum", "Lucro": "sum"})
-                .reset_index()
-            )
+            df_grupo = por_dimensao(cubo, "Grupo")[
+                ["Grupo", "Valor Total Liquido", "Lucro"]
+            ]
 
             df_grupo["Lucratividade %"] = (
                 df_grupo["Lucro"] /
                 df_grupo["Valor Total Liquido"]
             ) * 100
 
-            fig_grupo = px.pie(
+            fig_grupo = figura_em_cache(df_grupo, 'pizza', lambda: px.pie(
                 df_grupo,
                 names="Grupo",
                 values="Lucratividade %",
                 hole=0.4
-            )
+            ))
             
             st.plotly_chart(fig_grupo, use_container_width=True)
             
         st.divider()
 
         # ---------------- ANÁLISE CUSTO X VALOR UNITÁRIO ----------------
-        st.subheader("Análise: Custo Gerencial vs Valor Unitário")
-
-        df_scatter = df_filtrado.copy()
-
-        # Remover valores nulos ou zero
-        df_scatter = df_scatter[
-            (df_scatter["Valor Unitário Bruto"] > 0) &
-            (df_scatter["Custo Gerencial"] > 0)
-        ]
-
-        fig_scatter = px.scatter(
-            df_scatter,
-            x="Valor Unitário Bruto",
-            y="Custo Gerencial",
-            color="Grupo",  # pode trocar para "Seção" se preferir
-            hover_data=["DESCRICAO", "Lucro"],
-            title="Dispersão - Custo Gerencial vs Valor Unitário"
-        )
-
-        # Linha de referência (Custo = Valor)
-        max_val = max(
-            df_scatter["Valor Unitário Bruto"].max(),
-            df_scatter["Custo Gerencial"].max()
-        )
-
-        fig_scatter.add_shape(
-            type="line",
-            x0=0, y0=0,
-            x1=max_val, y1=max_val,
-            line=dict(color="red", dash="dash"),
-        )
-
-        fig_scatter.update_layout(
-            xaxis_title="Valor Unitário Bruto",
-            yaxis_title="Custo Gerencial"
+        perfil.secao("Custo Gerencial vs Valor Unitário", len(df_filtrado))
+        # A dispersão é identificada pelo dataset e filtros, sem varrer as linhas
+        painel_dispersao(
+            df_filtrado,
+            chave_agregado('dispersao', chave_dataset, selecao, mostrar_prejuizo)
         )
 
-        st.plotly_chart(fig_scatter, use_container_width=True)
-        
+        perfil.secao("Indicadores de Margem", len(produtos))
         st.divider()
         st.subheader("Indicadores Estratégicos de Margem")
 
-        df_margem = df_filtrado.copy()
-
-        df_margem["Margem Unitária"] = (
-            df_margem["Valor Unitário Bruto"] - df_margem["Custo Gerencial"]
-        )
-
-        df_margem["Status"] = df_margem["Margem Unitária"].apply(
-            lambda x: "Prejuízo" if x < 0 else "Saudável"
-        )
-
-        total_produtos = df_margem["DESCRICAO"].nunique()
-        produtos_prejuizo = df_margem[df_margem["Status"] == "Prejuízo"]["DESCRICAO"].nunique()
+        total_produtos = len(produtos)
+        produtos_prejuizo = produtos_com_prejuizo(produtos)
 
         percentual_risco = (
             (produtos_prejuizo / total_produtos) * 100
@@ -296,45 +215,163 @@ if uploaded_file is not None:
         c2.metric("Produtos com Prejuízo", produtos_prejuizo)
         c3.metric("Risco da Carteira (%)", f"{percentual_risco:.2f}%")
 
+        perfil.secao("Top 10 Prejuízos Unitários", len(produtos))
         st.divider()
         st.subheader("Top 10 Maiores Prejuízos Unitários")
 
-        ranking_prejuizo = (
-                df_margem[df_margem["Margem Unitária"] < 0]
-                .groupby("DESCRICAO")["Margem Unitária"]
-                .mean()
-                .sort_values()
-                .head(10)
-                .reset_index()
-            )
+        ranking_prejuizo = ranking(
+                produtos, "Margem Negativa Média", crescente=True
+            ).rename(columns={"Margem Negativa Média": "Margem Unitária"})
 
-        fig_ranking = px.bar(
+        fig_ranking = figura_em_cache(ranking_prejuizo, 'ranking_prejuizo', lambda: px.bar(
                 ranking_prejuizo,
                 x="Margem Unitária",
                 y="DESCRICAO",
                 orientation="h",
                 color="Margem Unitária",
                 color_continuous_scale="Reds"
-            )
-
-        fig_ranking.update_layout(
+            ).update_layout(
                 yaxis={'categoryorder': 'total ascending'}
-            )
+            ))
 
         st.plotly_chart(fig_ranking, use_container_width=True)
 
+        perfil.secao("Impacto Financeiro", len(cubo))
         st.subheader("Impacto Financeiro dos Produtos com Prejuízo")
 
-        df_prejuizo_total = df_margem.copy()
-        df_prejuizo_total["Prejuízo Total"] = (
-                df_prejuizo_total["Margem Unitária"] * df_prejuizo_total["Quantidade"]
+        impacto_total = impacto_prejuizo(cubo)
+
+        st.metric("Impacto Financeiro Total (R$)", f"R$ {impacto_total:,.2f}")
+    except Exception as e:
+        st.error(f"Erro ao processar o arquivo: {e}")
+
+    exibir_perfil(perfil.encerrar(), st.container())
+
+# --------------------------------------------------
+# SIDEBAR
+# --------------------------------------------------
+with st.sidebar:
+    st.image("logo.png", width=200)
+    st.header("Configurações de Dados")
+
+    uploaded_file = st.file_uploader(
+        "Faça upload da planilha Excel (.xlsx)",
+        type=['xlsx']
+    )
+
+    if uploaded_file:
+        st.success("Arquivo pronto para análise!")
+    else:
+        st.info("Aguardando arquivo...")
+
+# --------------------------------------------------
+# ÁREA PRINCIPAL
+# --------------------------------------------------
+st.title("Análise de Venda Gerencial - Grupo Adão e Eva")
+
+if uploaded_file is not None:
+    # As funções acima usam estes nomes só quando chamadas, já com a
+    # planilha enviada
+    from agregacao import (
+        CacheAgregados, chave_agregado, criar_agregador, impacto_prejuizo,
+        por_dimensao, por_produto, produtos_com_prejuizo, ranking,
+    )
+    from carteira import carregar_dados
+    from esquema import resumo_memoria
+    from filtros import BuscaTextual, IndiceFiltros
+    from graficos import (
+        CACHE_FIGURAS, LIMITE_PONTOS, MODO_AMOSTRA, MODO_DENSIDADE, MODO_PONTOS,
+        em_prejuizo, figura_dispersao, figura_em_cache,
+    )
+
+    try:
+        medicao = MedicaoMemoria()
+        perfil = PerfilSecoes("venda.py", perfil_solicitado(st.query_params))
+
+        perfil.secao("Carga")
+        data = carregar_dados(uploaded_file)
+
+        # ---------------- FILTROS ----------------
+        perfil.secao("Filtros", len(data))
+        with st.sidebar:
+            if resumo_memoria(data):
+                st.caption(resumo_memoria(data))
+
+            st.divider()
+            st.subheader("Filtros Avançados")
+
+            busca = indexar_busca(data, data.attrs['chave'])
+            termo = st.text_input(
+                "Buscar descrição",
+                placeholder="Digite parte do nome do produto"
             )
 
-        impacto_total = df_prejuizo_total[
-                df_prejuizo_total["Prejuízo Total"] < 0
-            ]["Prejuízo Total"].sum()
+            # As opções são a seleção atual mais as sugestões da busca;
+            # a seleção sobrevive à troca do termo pelo session_state
+            selecionadas = [
+                v for v in st.session_state.get("descricao_selecionada", [])
+                if v in busca.valores
+            ]
+            descricao = st.multiselect(
+                "Descrição",
+                options=list(dict.fromkeys(selecionadas + busca.buscar(termo))),
+                default=selecionadas
+            )
+            st.session_state["descricao_selecionada"] = descricao
 
-        st.metric("Impacto Financeiro Total (R$)", f"R$ {impacto_total:,.2f}")
+            secao = st.multiselect(
+                "Seção",
+                options=data['Seção'].unique()
+            )
+
+            grupo = st.multiselect(
+                "Grupo",
+                options=data['Grupo'].unique()
+            )
+
+        selecao = {
+            'DESCRICAO': descricao,
+            'Seção': secao,
+            'Grupo': grupo,
+        }
+        indice = indexar_filtros(data, data.attrs['chave'])
+        df_filtrado = indice.filtrar(data, selecao)
+
+        # ---------------- MÉTRICAS ----------------
+        perfil.secao("Resumo Geral", len(df_filtrado))
+        st.subheader("Resumo Geral")
+
+        totais = cache_agregados().obter(
+            chave_agregado('totais', data.attrs['chave'], selecao),
+            criar_agregador(df_filtrado).totais
+        )
+        total_venda = totais['Valor Total Liquido']
+        total_lucro = totais['Lucro']
+        total_qtd = totais['Quantidade']
+
+        lucratividade = (
+            (total_lucro / total_venda) * 100
+            if total_venda > 0 else 0
+        )
+
+        m1, m2, m3, m4 = st.columns(4)
+
+        m1.metric("Faturamento Total", f"R$ {total_venda:,.2f}")
+        m2.metric("Lucro Total", f"R$ {total_lucro:,.2f}")
+        m3.metric("Qtd Itens Vendidos", f"{total_qtd:,.0f}")
+        m4.metric("Lucratividade %", f"{lucratividade:.2f}%")
+        
+        st.divider()
+
+        exibir_perfil(perfil.encerrar(), st.sidebar)
+        st.sidebar.caption(cache_agregados().resumo())
+        st.sidebar.caption(CACHE_FIGURAS.resumo())
+
+        painel_produtos(df_filtrado, data.attrs['chave'], selecao, perfil.ativo)
+
+        pico_memoria = medicao.encerrar()
+        if pico_memoria is not None:
+            st.sidebar.caption(f"Pico de memória da execução: {pico_memoria:,.1f} MB")
 
     except Exception as e:
         st.error(f"Erro ao processar o arquivo: {e}")
\ No newline at end of file
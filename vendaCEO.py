@@ -1,31 +1,8 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
 
-st.set_page_config(layout="wide", page_title="Dashboard Estratégico CEO")
-
-# --------------------------------------------------
-# FUNÇÃO DE CARGA
-# --------------------------------------------------
-@st.cache_data
-def carregar_dados(uploaded_file):
-    data = pd.read_excel(uploaded_file)
+from perfil import PerfilSecoes, exibir_perfil, perfil_solicitado
 
-    cols_to_drop = ['IDSUBPRODUTO','REFERENCIA','IDSECAO','IDSUBGRUPO']
-    data = data.drop(columns=cols_to_drop, errors='ignore')
-
-    data = data.rename(columns={
-        'QTDPRODUTO': 'Quantidade',
-        'LUCRO': 'Lucro',
-        'CUSTOGERENCIAL': 'Custo Gerencial',
-        'VALTOTLIQUIDO': 'Valor Total Liquido',
-        'VALUNITBRUTO': 'Valor Unitário Bruto',
-        'DESCRSECAO': 'Seção',
-        'DESCRGRUPO': 'Grupo'
-    })
-
-    return data
+st.set_page_config(layout="wide", page_title="Dashboard Estratégico CEO")
 
 # --------------------------------------------------
 # SIDEBAR
@@ -33,7 +10,9 @@ def carregar_dados(uploaded_file):
 with st.sidebar:
     st.image("logo.png", width=200)
     st.header("Upload de Dados")
-    uploaded_file = st.file_uploader("Upload Excel (.xlsx)", type=["xlsx"])
+    uploaded_file = st.file_uploader(
+        "Upload Excel (.xlsx) ou consolidado (.parquet)", type=["xlsx", "parquet"]
+    )
 
 # --------------------------------------------------
 # INÍCIO
@@ -41,25 +20,28 @@ with st.sidebar:
 st.title("📊 Dashboard Estratégico - Visão CEO")
 
 if uploaded_file:
+    from agregacao import por_produto, ranking
+    from carteira import carregar_carteira
+    from classificacao import curva_abc
+    from graficos import figura_em_cache
+    from indicadores import indicadores_carteira, margem_por
+
+    perfil = PerfilSecoes("vendaCEO.py", perfil_solicitado(st.query_params))
 
-    df = carregar_dados(uploaded_file)
+    totais, cubo = carregar_carteira(uploaded_file, perfil)
 
     # --------------------------------------------------
     # VISÃO EXECUTIVA
     # --------------------------------------------------
 
-    total_venda = df['Valor Total Liquido'].sum()
-    total_lucro = df['Lucro'].sum()
-    total_qtd = df['Quantidade'].sum()
-    margem_geral = (total_lucro / total_venda) * 100 if total_venda > 0 else 0
-
-    df['Margem Unitária'] = df['Valor Unitário Bruto'] - df['Custo Gerencial']
-    df['Prejuízo Total'] = df['Margem Unitária'] * df['Quantidade']
+    produtos = por_produto(cubo)
 
-    produtos_total = df['DESCRICAO'].nunique()
-    produtos_prejuizo = df[df['Margem Unitária'] < 0]['DESCRICAO'].nunique()
-    risco_carteira = (produtos_prejuizo / produtos_total) * 100 if produtos_total > 0 else 0
-    impacto_prejuizo = df[df['Prejuízo Total'] < 0]['Prejuízo Total'].sum()
+    indicadores = indicadores_carteira(totais, cubo, produtos)
+    total_venda = indicadores['faturamento']
+    total_lucro = indicadores['lucro']
+    margem_geral = indicadores['margem_geral']
+    risco_carteira = indicadores['risco_carteira']
+    impacto = indicadores['impacto_prejuizo']
 
     c1, c2, c3, c4 = st.columns(4)
 
@@ -68,7 +50,7 @@ if uploaded_file:
     c3.metric("Margem Geral (%)", f"{margem_geral:.2f}%")
     c4.metric("Risco da Carteira (%)", f"{risco_carteira:.2f}%")
 
-    st.metric("💣 Impacto Financeiro do Prejuízo", f"R$ {impacto_prejuizo:,.2f}")
+    st.metric("💣 Impacto Financeiro do Prejuízo", f"R$ {impacto:,.2f}")
 
     st.divider()
 
@@ -76,34 +58,23 @@ if uploaded_file:
     # CURVA ABC
     # --------------------------------------------------
 
-    st.subheader("📈 Curva ABC - Produtos")
-
-    abc = (
-        df.groupby('DESCRICAO')['Valor Total Liquido']
-        .sum()
-        .sort_values(ascending=False)
-        .reset_index()
-    )
+    perfil.secao("Curva ABC", len(produtos))
+    import plotly.express as px
 
-    abc['% Acumulado'] = abc['Valor Total Liquido'].cumsum() / abc['Valor Total Liquido'].sum() * 100
+    st.subheader("📈 Curva ABC - Produtos")
 
-    def classificar_abc(p):
-        if p <= 80:
-            return 'A'
-        elif p <= 95:
-            return 'B'
-        else:
-            return 'C'
+    abc = ranking(produtos, 'Valor Total Liquido', n=None)
 
-    abc['Classe ABC'] = abc['% Acumulado'].apply(classificar_abc)
+    abc = curva_abc(abc, 'Valor Total Liquido')
 
-    fig_abc = px.bar(
-        abc.head(30),
+    abc_topo = abc.head(30)
+    fig_abc = figura_em_cache(abc_topo, 'abc', lambda: px.bar(
+        abc_topo,
         x='DESCRICAO',
         y='% Acumulado',
         color='Classe ABC',
         title="Classificação ABC por Faturamento"
-    )
+    ))
 
     st.plotly_chart(fig_abc, use_container_width=True)
 
@@ -119,25 +90,18 @@ if uploaded_file:
     # TOP PRODUTOS POR LUCRO (DECISÃO REAL)
     # --------------------------------------------------
 
+    perfil.secao("Top 10 Lucro", len(produtos))
     st.subheader("🏆 Top 10 Produtos por Lucro")
 
-    top_lucro = (
-        df.groupby('DESCRICAO')['Lucro']
-        .sum()
-        .sort_values(ascending=False)
-        .head(10)
-        .reset_index()
-    )
+    top_lucro = ranking(produtos, 'Lucro')
 
-    fig_top_lucro = px.bar(
+    fig_top_lucro = figura_em_cache(top_lucro, 'top_lucro', lambda: px.bar(
         top_lucro,
         x='Lucro',
         y='DESCRICAO',
         orientation='h',
         color='Lucro'
-    )
-
-    fig_top_lucro.update_layout(yaxis={'categoryorder':'total ascending'})
+    ).update_layout(yaxis={'categoryorder':'total ascending'}))
     st.plotly_chart(fig_top_lucro, use_container_width=True)
 
     st.divider()
@@ -146,26 +110,19 @@ if uploaded_file:
     # PRODUTOS QUE DESTROEM VALOR
     # --------------------------------------------------
 
+    perfil.secao("Destruidores de Lucro", len(produtos))
     st.subheader("⚠️ Top 10 Produtos que Mais Destruíram Lucro")
 
-    piores = (
-        df.groupby('DESCRICAO')['Prejuízo Total']
-        .sum()
-        .sort_values()
-        .head(10)
-        .reset_index()
-    )
+    piores = ranking(produtos, 'Prejuízo Total', crescente=True)
 
-    fig_piores = px.bar(
+    fig_piores = figura_em_cache(piores, 'piores', lambda: px.bar(
         piores,
         x='Prejuízo Total',
         y='DESCRICAO',
         orientation='h',
         color='Prejuízo Total',
         color_continuous_scale='Reds'
-    )
-
-    fig_piores.update_layout(yaxis={'categoryorder':'total ascending'})
+    ).update_layout(yaxis={'categoryorder':'total ascending'}))
     st.plotly_chart(fig_piores, use_container_width=True)
 
     st.divider()
@@ -174,21 +131,18 @@ if uploaded_file:
     # ANÁLISE ESTRUTURAL DE MARGEM
     # --------------------------------------------------
 
+    perfil.secao("Margem por Grupo", len(cubo))
     st.subheader("📊 Margem por Grupo")
 
-    grupo = (
-        df.groupby('Grupo')
-        .agg({'Valor Total Liquido':'sum','Lucro':'sum'})
-        .reset_index()
-    )
-
-    grupo['Margem %'] = (grupo['Lucro'] / grupo['Valor Total Liquido']) * 100
+    grupo = margem_por(cubo, 'Grupo')
 
-    fig_grupo = px.bar(
+    fig_grupo = figura_em_cache(grupo, 'margem_grupo', lambda: px.bar(
         grupo,
         x='Grupo',
         y='Margem %',
         color='Margem %'
-    )
+    ))
 
     st.plotly_chart(fig_grupo, use_container_width=True)
+
+    exibir_perfil(perfil.encerrar(), st.sidebar)